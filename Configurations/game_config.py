@@ -1,3 +1,12 @@
+"""
+The configurations for games and server lobbies
+
+The module constants are the settings of the default game. A game reads its
+settings from the GameConfig passed to it, so games of different sizes can
+run in the same process
+"""
+from dataclasses import dataclass
+
 # Game Configurations
 FIELD_ROW = 15
 FIELD_COL = 15
@@ -8,3 +17,46 @@ BARRICADE_ARMOR_RANGE = (1, 3)
 SOUND_REDUCTION = 2
 HEAT_REDUCTION = 1
 GADGET_RESTORE_PERIOD = 10
+
+
+@dataclass(frozen=True)
+class GameConfig:
+    """
+    configurations for a game
+
+        - field_row: the num of rows in the battlefield
+        - field_col: the num of columns in the battlefield
+        - barricade_coverage: the probability that a grid is covered by a barricade
+        - hard_barricade_coverage: the probability that a grid is covered by a hard barricade
+        - barricade_HP_range: the range of hard barricade HP
+        - barricade_armor_range: the range of hard barricade armor
+        - sound_reduction: the reduction of sound after each round
+        - heat_reduction: the reduction of heat after each round
+        - gadget_restore_period: the number of rounds between gadget refills
+    """
+    field_row: int = FIELD_ROW
+    field_col: int = FIELD_COL
+    barricade_coverage: float = BARRICADE_COVERAGE
+    hard_barricade_coverage: float = HARD_BARRICADE_COVERAGE
+    barricade_HP_range: tuple = BARRICADE_HP_RANGE
+    barricade_armor_range: tuple = BARRICADE_ARMOR_RANGE
+    sound_reduction: int = SOUND_REDUCTION
+    heat_reduction: int = HEAT_REDUCTION
+    gadget_restore_period: int = GADGET_RESTORE_PERIOD
+
+
+@dataclass(frozen=True)
+class LobbySpec:
+    """
+    configurations for a server lobby, which matches players into games of the same settings
+
+        - port: the port the lobby accepts players on
+        - num_players: the number of players in each game
+        - game_config: the configuration of each game
+    """
+    port: int
+    num_players: int
+    game_config: GameConfig
+
+
+default_game_config = GameConfig()
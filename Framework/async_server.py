@@ -0,0 +1,264 @@
+"""
+The asyncio game server
+
+All games are hosted by one event loop. Players wait for the game start and
+for the end of each round on asyncio events instead of spinning threads,
+and each game runs its rounds in its own task once every player has sent
+a command
+
+The server hosts one lobby on each port of LOBBIES, and each lobby matches
+its players into games of its own size and settings
+"""
+import asyncio
+import itertools
+import os
+
+from robot import Robot
+from game import Game
+import message
+from message import Message
+import framing
+import state_sync
+from Configurations.game_config import GameConfig, LobbySpec, default_game_config
+
+SERVER = "100.71.95.209"  # the server's address, currently local address
+# the lobbies hosted by the server, each on its own port
+LOBBIES = [
+    LobbySpec(port=5555, num_players=3, game_config=default_game_config),
+]
+JOURNAL_DIR = None  # the directory to record game journals, None to disable journals
+VERBOSE_GAMES = False  # whether hosted games print the battlefield each round, blocks the event loop, for debugging only
+
+
+class GameSession:
+    """
+    A game hosted by the server and the players connected to it
+    """
+
+    def __init__(self, game_id: int, num_players: int, config: GameConfig = default_game_config) -> None:
+        """
+        Initialize the session with a new game
+
+        :param game_id: the id of the game
+        :param num_players: the number of players to start the game
+        :param config: the configuration of the game
+        """
+        self.game = Game(game_id, num_players, verbose=VERBOSE_GAMES, config=config)
+        if JOURNAL_DIR is not None:
+            self.game.start_journal(os.path.join(JOURNAL_DIR, f"game_{game_id}.journal"))
+        self.num_players = num_players
+        self.num_joined = 0  # the number of players assigned to the game
+        self.started = asyncio.Event()  # set when all players join the game
+        self.active = set()  # the ids of players still in the game
+        self.trackers = {}  # the state tracker of each player, player_id: StateTracker
+        self.commands = {}  # the commands received in the round, player_id: Message
+        self.commands_ready = asyncio.Event()  # set when every active player sent a command
+        self.round_result = asyncio.get_running_loop().create_future()  # the deltas of the round
+
+    def is_full(self) -> bool:
+        """
+        :return: whether all players are assigned to the game
+        """
+        return self.num_joined == self.num_players
+
+    def assign_player_id(self) -> int:
+        """
+        Assign an id to a new player, from 1 to num_players
+
+        :return: the id of the player
+        """
+        self.num_joined += 1
+        return self.num_joined
+
+    def add_player(self, player: Robot) -> None:
+        """
+        Add a new player to the game, start the game when it is full
+
+        The player's changes are tracked from the robot sent when it joins,
+        the robot does not change until the game starts
+
+        :param player: the player to add
+        :return: None
+        """
+        self.game.add_player(player, player.get_id())
+        self.trackers[player.get_id()] = state_sync.StateTracker(player)
+        self.active.add(player.get_id())
+        if len(self.game.players) == self.num_players:
+            self.started.set()
+
+    def submit(self, player_message: Message) -> asyncio.Future:
+        """
+        Submit a player's command for the round
+
+        :param player_message: the command of the player
+        :return: the future of the round result
+        """
+        self.commands[player_message.source] = player_message
+        if self.active.issubset(self.commands):
+            self.commands_ready.set()
+        return self.round_result
+
+    async def run(self) -> None:
+        """
+        Execute the rounds of the game until every player leaves
+
+        :return: None
+        """
+        await self.started.wait()
+        while self.active:
+            await self.commands_ready.wait()
+            self.commands_ready.clear()
+            self.execute_round()
+
+    def execute_round(self) -> None:
+        """
+        Execute the commands of the round, and resolve the round result
+        with the delta of each player's robot
+
+        :return: None
+        """
+        game = self.game
+        for player_message in self.commands.values():
+            game.message_center.add_message(player_message)
+        game.message_center.execute_commands()
+
+        game.update_player_maps(sorted(self.active))  # update the robot local maps
+        deltas = {}
+        for player_id in self.active:
+            deltas[player_id] = self.trackers[player_id].make_delta(game.get_player(player_id))
+        game.update_game()
+
+        # players who disconnect leave after the round
+        for player_id, player_message in self.commands.items():
+            if player_message.type == message.TYPE_DISCONNECT:
+                self.active.discard(player_id)
+        self.commands = {}
+
+        self.round_result.set_result(deltas)
+        self.round_result = asyncio.get_running_loop().create_future()
+
+
+class GameServer:
+    """
+    Accept players and match them into game sessions
+    """
+
+    def __init__(self, num_players: int, config: GameConfig = default_game_config, game_ids=None) -> None:
+        """
+        Initialize the server
+
+        :param num_players: the number of players in each game
+        :param config: the configuration of each game
+        :param game_ids: the iterator of ids for new games, shared by the servers of one host, from 0 if None
+        """
+        self.num_players = num_players
+        self.config = config
+        self.game_ids = game_ids if game_ids is not None else itertools.count()
+        self.sessions = {}  # the games being played, game_id: GameSession
+        self.waiting = None  # the session waiting for players
+
+    def join_session(self) -> GameSession:
+        """
+        Return the session for a new player, create a new session if no session is waiting
+
+        :return: the session to join
+        """
+        if self.waiting is None or self.waiting.is_full():
+            print("Creating a new game...")
+            game_id = next(self.game_ids)
+            self.waiting = GameSession(game_id, self.num_players, self.config)
+            self.sessions[game_id] = self.waiting
+            asyncio.create_task(self.run_session(game_id, self.waiting))
+        return self.waiting
+
+    async def run_session(self, game_id: int, session: GameSession) -> None:
+        """
+        Run a session and remove it when the game ends
+
+        :param game_id: the id of the game
+        :param session: the session to run
+        :return: None
+        """
+        await session.run()
+        if session.game.journal is not None:
+            session.game.journal.close()
+        del self.sessions[game_id]
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Handle a player connection
+
+        :param reader: the stream to read client messages
+        :param writer: the stream to write server responses
+        :return: None
+        """
+        print("connect to " + str(writer.get_extra_info('peername')))
+        session = None
+        player_id = None
+        joined = False  # whether the player is added to the game
+
+        try:
+            # receive robot configuration, the player joins a game after the configuration arrives
+            config = await framing.read_object(reader)
+            session = self.join_session()
+            player_id = session.assign_player_id()
+            player = Robot(config, player_id, session.game.config)
+            session.add_player(player)  # add player to field
+            joined = True
+            await framing.write_object(writer, player)
+
+            # wait for all players to connect
+            await session.started.wait()
+
+            # send client's robot when all players join the game
+            if (await framing.read_object(reader)).type == message.TYPE_CONNECT:
+                await framing.write_object(writer, player)
+
+            # the game loop
+            while player_id in session.active:
+                try:
+                    client_message = await framing.read_object(reader)  # read client command
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    # the client leaves without a disconnect message
+                    session.submit(Message(player_id, message.TYPE_DISCONNECT, message.DISCONNECT, None, -1))
+                    break
+
+                deltas = await session.submit(client_message)
+                await framing.write_object(writer, deltas[player_id])
+        except Exception as exception:  # cannot communicate with client
+            print(exception)
+            if session is not None and not joined:
+                # the player failed to join, its id is the last one assigned since joining does not wait
+                session.num_joined -= 1
+            elif joined and player_id in session.active and player_id not in session.commands:
+                session.submit(Message(player_id, message.TYPE_DISCONNECT, message.DISCONNECT, None, -1))
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        """
+        Accept connections until the server is stopped
+
+        :param host: the server's address
+        :param port: the port for connection
+        :return: None
+        """
+        server = await asyncio.start_server(self.handle_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+async def serve_lobbies(host: str, lobbies: list[LobbySpec]) -> None:
+    """
+    Host every lobby in one event loop until the server is stopped
+
+    :param host: the server's address
+    :param lobbies: the lobbies to host
+    :return: None
+    """
+    game_ids = itertools.count()  # the ids of games are unique across lobbies
+    await asyncio.gather(*[GameServer(lobby.num_players, lobby.game_config, game_ids).serve(host, lobby.port) for lobby in lobbies])
+
+
+if __name__ == '__main__':
+    asyncio.run(serve_lobbies(SERVER, LOBBIES))
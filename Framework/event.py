@@ -1,4 +1,23 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+EVENT_TYPES = {}  # the factories of named events, name: factory
+
+
+def register_event(name: str):
+    """
+    Register a factory of named events
+
+    The factory is called as factory(game, *args) and returns the callback of
+    the event. Only named events can be saved in a game snapshot, since the
+    callback is rebuilt from the name and arguments when the game is restored
+
+    :param name: the name of the event
+    :return: the decorator registering the factory
+    """
+    def decorator(factory):
+        EVENT_TYPES[name] = factory
+        return factory
+    return decorator
 
 
 @dataclass
@@ -9,10 +28,36 @@ class Event:
         - start_round: the round to start
         - end_round: the round to end
         - callback: the callback function to execute
+        - name: the registered name of the event, None if the event cannot be saved
+        - args: the integer arguments passed to the factory of a named event
+        - target: the id of the player affected by the event, None if the event affects no player
+        - cancelled: whether the event is cancelled
     """
     start_round: int
     end_round: int
     callback: callable
+    name: str = None
+    args: tuple = field(default_factory=tuple)
+    target: int = None
+    cancelled: bool = False
 
     def __lt__(self, other):
         return self.start_round < other.start_round
+
+
+def make_event(game, name: str, start_round: int, end_round: int, *args: int, target: int = None) -> Event:
+    """
+    Create a named event from its registered factory
+
+    Preconditions:
+        - name in EVENT_TYPES
+
+    :param game: the game of the event
+    :param name: the registered name of the event
+    :param start_round: the round to start
+    :param end_round: the round to end
+    :param args: the integer arguments of the event
+    :param target: the id of the player affected by the event
+    :return: the event
+    """
+    return Event(start_round, end_round, EVENT_TYPES[name](game, *args), name, tuple(args), target)
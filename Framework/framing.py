@@ -0,0 +1,131 @@
+"""
+Length-prefixed framing for messages between client and server
+
+Each frame is a 4-byte big-endian payload length followed by the payload,
+so a message is read in one pass with recv_into into a reusable buffer,
+and written with one sendall so the header and payload leave together.
+Frames longer than MAX_FRAME_SIZE are refused before any buffer is
+allocated for them
+
+The coroutines at the end read and write the same frames on asyncio streams
+"""
+import asyncio
+import pickle
+import socket
+import struct
+
+HEADER = struct.Struct('!I')  # the length of the payload
+MAX_FRAME_SIZE = 16 * 1024 * 1024  # the longest payload accepted from a peer
+
+
+def check_frame_size(size: int) -> None:
+    """
+    Refuse a frame whose payload is longer than MAX_FRAME_SIZE
+
+    :param size: the payload length read from the header
+    :return: None
+    """
+    if size > MAX_FRAME_SIZE:
+        raise ConnectionError(f"frame of {size} bytes exceeds the maximum of {MAX_FRAME_SIZE} bytes")
+
+
+def send_frame(conn: socket.socket, payload: bytes) -> None:
+    """
+    Send a payload as one frame
+
+    :param conn: the connection to send the frame
+    :param payload: the payload to send
+    :return: None
+    """
+    # one write, so Nagle's algorithm does not hold the payload back behind the header
+    conn.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def send_object(conn: socket.socket, obj) -> None:
+    """
+    Pickle an object and send it as one frame
+
+    :param conn: the connection to send the frame
+    :param obj: the object to send
+    :return: None
+    """
+    send_frame(conn, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class FrameReader:
+    """
+    Read frames from a connection into a reusable buffer
+    """
+    def __init__(self, buffer_size: int = 2048 * 16):
+        """
+        Initialize the frame reader
+
+        :param buffer_size: the initial size of the buffer, the buffer grows for larger frames
+        """
+        self.buffer = bytearray(buffer_size)
+
+    def read_exactly(self, conn: socket.socket, size: int) -> memoryview:
+        """
+        Read exactly size bytes from the connection into the buffer
+
+        :param conn: the connection to read from
+        :param size: the number of bytes to read
+        :return: a view of the bytes read, valid until the next read
+        """
+        if size > len(self.buffer):
+            self.buffer = bytearray(max(size, 2 * len(self.buffer)))
+
+        view = memoryview(self.buffer)[:size]
+        received = 0
+        while received < size:
+            count = conn.recv_into(view[received:], size - received)
+            if count == 0:
+                raise ConnectionError("connection closed while receiving a frame")
+            received += count
+
+        return view
+
+    def recv_frame(self, conn: socket.socket) -> memoryview:
+        """
+        Receive one frame from the connection
+
+        :param conn: the connection to read from
+        :return: a view of the payload, valid until the next read
+        """
+        size = HEADER.unpack(self.read_exactly(conn, HEADER.size))[0]
+        check_frame_size(size)
+        return self.read_exactly(conn, size)
+
+    def recv_object(self, conn: socket.socket):
+        """
+        Receive one frame from the connection and unpickle it
+
+        :param conn: the connection to read from
+        :return: the object received
+        """
+        return pickle.loads(self.recv_frame(conn))
+
+
+async def read_object(reader: asyncio.StreamReader):
+    """
+    Receive one frame from an asyncio stream and unpickle it
+
+    :param reader: the stream to read from
+    :return: the object received
+    """
+    size = HEADER.unpack(await reader.readexactly(HEADER.size))[0]
+    check_frame_size(size)
+    return pickle.loads(await reader.readexactly(size))
+
+
+async def write_object(writer: asyncio.StreamWriter, obj) -> None:
+    """
+    Pickle an object and send it as one frame on an asyncio stream
+
+    :param writer: the stream to write to
+    :param obj: the object to send
+    :return: None
+    """
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    writer.write(HEADER.pack(len(payload)) + payload)
+    await writer.drain()  # wait while the transport buffer is full, so slow clients do not pile up frames
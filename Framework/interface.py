@@ -8,8 +8,11 @@ class IDisplayable:
     """
     IDisplayable: an object can be displayed as a string representation
 
-    child classes should implement display() method
+    child classes should implement display() method, and the ones placed
+    on the battlefield should set kind to their occupancy kind defined in grid
     """
+    kind: int = None  # the occupancy kind of the object on the battlefield
+
     def display(self) -> str:
         """
         Return a string display of the obejct
@@ -1,20 +1,23 @@
 import socket
-import pickle
+import framing
+import state_sync
 
 
 class Network:
     """
     Client-side network connection, connect a client to server
     """
-    def __init__(self, server_ip: str):
+    def __init__(self, server_ip: str, port: int = 5555):
         self.client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server = server_ip  # the server's address, currently local address
         """
             Note: always check for correct server ip
         """
-        self.port = 5555  # the port for connection
+        self.port = port  # the port for connection, the port of the lobby to join
         self.addr = (self.server, self.port)
         self.player = None
+        self.sequence = 0  # the sequence of the last robot delta applied
+        self.reader = framing.FrameReader()  # read server responses
 
     def get_player(self):
         """
@@ -31,8 +34,8 @@ class Network:
         """
         try:
             self.client.connect(self.addr)  # connect client socket to server address
-            self.client.send(pickle.dumps(robot_config))  # send robot configuration to server
-            self.player = pickle.loads(self.client.recv(2048 * 16))     # receive Robot object from server
+            framing.send_object(self.client, robot_config)  # send robot configuration to server
+            self.player = self.reader.recv_object(self.client)     # receive Robot object from server
         except Exception as e:
             print(e)
             pass
@@ -41,27 +44,24 @@ class Network:
         """
         Send data to server and receive the server's response
 
+        The server responds with either the full robot, or the changes of
+        the robot since the last response
+
         :param data: the data sent to server
-        :return: the server's response
+        :return: the player's robot after the response
         """
         try:
-            self.client.send(pickle.dumps(data))   # send client command
-            # self.player = pickle.loads(self.client.recv(2048 * 16))
-            data = b""
-            while True:
-                packet = self.client.recv(2048)
-                if not packet:
-                    break
-                data += packet
-
-                # Check if a complete pickle object has been received
-                try:
-                    self.player = pickle.loads(data)
-                    return self.player  # Return the unpickled object if successful
-                except pickle.UnpicklingError:
-                    continue  # Incomplete object, continue receiving data
-
-            return None  # Return None if no complete object is received
+            framing.send_object(self.client, data)   # send client command
+            response = self.reader.recv_object(self.client)
+            if isinstance(response, state_sync.RobotDelta):
+                # apply the changes of the robot in the round
+                self.sequence += 1
+                state_sync.apply_delta(self.player, response, self.sequence)
+            else:
+                # receive the full robot
+                self.player = response
+                self.sequence = 0
+            return self.player
         except socket.error as e:
             print(e)
 
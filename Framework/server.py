@@ -1,28 +1,24 @@
+import itertools
 import socket
 from _thread import *
-import pickle
 
 from robot import Robot
 from game import Game
 import message
+import framing
+import state_sync
+from Configurations.game_config import LobbySpec, default_game_config
 
 server = "100.71.95.209"  # the server's address, currently local address
-port = 5555  # the port for connection
 
-server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-
-# initialze the server
-try:
-    server_socket.bind((server, port))  # bind the server and the port
-except socket.error as e:
-    str(e)  # print socket error message
-
-# wait for client connection
-NUM_PLAYERS = 3  # the numbere of players in each game
-server_socket.listen(NUM_PLAYERS)  # listen for connection, param: the maximum connection accepted
+# the lobbies hosted by the server, each on its own port
+LOBBIES = [
+    LobbySpec(port=5555, num_players=3, game_config=default_game_config),
+]
 
 games = {}  # store games id(int): Game
-id_count = 0  # the total number of client threads created
+game_ids = itertools.count()  # the ids of games, unique across lobbies
+games_lock = allocate_lock()  # guard game creation from the lobby threads
 
 
 def threaded_client(conn, player_id: int, game_id: int):
@@ -36,27 +32,30 @@ def threaded_client(conn, player_id: int, game_id: int):
     """
     global games
     current_game = games[game_id]
+    reader = framing.FrameReader()  # read client messages
     print("start new thread")
 
     # receive robot configuration
-    config = pickle.loads(conn.recv(2048 * 16))
-    player = Robot(config, player_id)
+    config = reader.recv_object(conn)
+    player = Robot(config, player_id, current_game.config)
     current_game.add_player(player, player_id)  # add player to field
-    conn.send(pickle.dumps(player))
+    framing.send_object(conn, player)
 
     # wait for all players to connect
     while not current_game.game_start:
         pass
 
     # send client's robot when all players join the game
-    if pickle.loads(conn.recv(2048 * 16)).type == message.TYPE_CONNECT:
-        conn.send(pickle.dumps(current_game.get_player(player_id)))
+    if reader.recv_object(conn).type == message.TYPE_CONNECT:
+        framing.send_object(conn, current_game.get_player(player_id))
+    # only send the changes of the robot after the full robot is sent
+    tracker = state_sync.StateTracker(current_game.get_player(player_id))
 
     # the game loop
     while True:
         try:
             # receive client message
-            client_message = pickle.loads(conn.recv(2048 * 16))  # read client command
+            client_message = reader.recv_object(conn)  # read client command
             current_game.message_center.receive_message(client_message)  # add message to message center
             print("receive client message")
 
@@ -64,10 +63,9 @@ def threaded_client(conn, player_id: int, game_id: int):
             while not current_game.message_center.complete_round:
                 pass
 
-            # send client status
+            # send client status, the robot local map is updated with the round
             print("finish processing commands, send client status")
-            current_game.update_player_map(current_game.get_player(player_id))  # update the robot local map
-            conn.send(pickle.dumps(current_game.get_player(player_id)))
+            framing.send_object(conn, tracker.make_delta(current_game.get_player(player_id)))
 
             # update game
             current_game.reset_game_update()
@@ -76,17 +74,42 @@ def threaded_client(conn, player_id: int, game_id: int):
             break
 
 
-while True:
-    conn, addr = server_socket.accept()
-    print("connect to " + str(addr))
+def run_lobby(lobby: LobbySpec):
+    """
+    Accept players on the port of a lobby and match them into games of the lobby
+
+    :param lobby: the lobby to host
+    :return: None
+    """
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+    # initialze the server
+    try:
+        server_socket.bind((server, lobby.port))  # bind the server and the port
+    except socket.error as e:
+        str(e)  # print socket error message
+
+    # wait for client connection
+    server_socket.listen(lobby.num_players)  # listen for connection, param: the maximum connection accepted
+
+    num_joined = 0  # the total number of players joined the lobby
+    game_id = None  # the game waiting for players
+    while True:
+        conn, addr = server_socket.accept()
+        print("connect to " + str(addr))
+
+        num_joined += 1
+        player_id = (num_joined - 1) % lobby.num_players + 1   # the id of each player, from 1 to num_players
+        if player_id == 1:  # start a new game
+            with games_lock:
+                game_id = next(game_ids)
+                games[game_id] = Game(game_id, lobby.num_players, config=lobby.game_config)  # create new game
+            print("Creating a new game...")
+
+        start_new_thread(threaded_client, (conn, player_id, game_id))  # assign a new thread to handle player
 
-    id_count += 1
-    game_id = (id_count - 1) // NUM_PLAYERS   # match players to a game
-    player_id = 1   # the id of each player, from 1 to num_players
-    if id_count % NUM_PLAYERS == 1:  # start a new game
-        games[game_id] = Game(game_id, NUM_PLAYERS)  # create new game
-        print("Creating a new game...")
-    else:   # join the player in an existing game
-        player_id = id_count % NUM_PLAYERS
 
-    start_new_thread(threaded_client, (conn, player_id, game_id))  # assign a new thread to handle player
+# every lobby accepts players in its own thread, the first lobby uses the main thread
+for lobby in LOBBIES[1:]:
+    start_new_thread(run_lobby, (lobby,))
+run_lobby(LOBBIES[0])
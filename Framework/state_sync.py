@@ -0,0 +1,116 @@
+"""
+Synchronize a player's robot between server and client
+
+The server sends the full robot once when the game starts. After each
+round, it only sends a RobotDelta with the fields that changed since
+the previous round, and the client applies the delta to its local robot
+"""
+from dataclasses import dataclass
+from grid import Grid
+from robot_info import encode_infos, decode_infos
+
+PROTOCOL_VERSION = 2  # increase when the fields of RobotDelta change
+
+
+@dataclass
+class RobotDelta:
+    """
+    The changes of a robot in one round
+
+        - version: the protocol version of the delta
+        - sequence: the number of the delta, starting from 1 after the full robot is sent
+        - HP: the robot's HP
+        - armor: the robot's armor
+        - pos: the (x, y) of the robot
+        - states: the encoded robot states, None if unchanged
+        - gadget_remain: the remaining use of each gadget, None if unchanged
+        - info: the information gathered in the round, encoded by encode_infos()
+        - vision: the robot's current vision
+        - map_changes: the (x, y, mark) of each changed grid on the local map
+    """
+    version: int
+    sequence: int
+    HP: int
+    armor: int
+    pos: tuple
+    states: tuple
+    gadget_remain: tuple
+    info: bytes
+    vision: list
+    map_changes: list
+
+
+class StateTracker:
+    """
+    Remember the state of a robot last sent to a client, and build the deltas
+    """
+    def __init__(self, robot) -> None:
+        """
+        Start tracking a robot after it is sent to the client in full
+
+        :param robot: the robot sent to the client
+        """
+        self.sequence = 0
+        self.states = robot.states.encode()
+        self.gadget_remain = tuple(gadget.remain for gadget in robot.gadgets)
+
+    def make_delta(self, robot) -> RobotDelta:
+        """
+        Build the delta of the robot since the last delta, and remember the sent state
+
+        :param robot: the robot to send
+        :return: the delta of the robot
+        """
+        self.sequence += 1
+
+        states = robot.states.encode()
+        gadget_remain = tuple(gadget.remain for gadget in robot.gadgets)
+        # the map logs its changes in the round, one delta is sent each round
+        map_changes = robot.map.changes()
+
+        delta = RobotDelta(
+            version=PROTOCOL_VERSION,
+            sequence=self.sequence,
+            HP=robot.HP,
+            armor=robot.armor,
+            pos=robot.get_pos(),
+            states=states if states != self.states else None,
+            gadget_remain=gadget_remain if gadget_remain != self.gadget_remain else None,
+            info=encode_infos(robot.info_list),
+            vision=list(robot.vision),
+            map_changes=map_changes
+        )
+        self.states = states
+        self.gadget_remain = gadget_remain
+        return delta
+
+
+def apply_delta(robot, delta: RobotDelta, sequence: int) -> None:
+    """
+    Apply a delta received from server to the local robot
+
+    :param robot: the local robot
+    :param delta: the delta received
+    :param sequence: the sequence of the delta expected
+    :return: None
+    """
+    if delta.version != PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported protocol version {delta.version}")
+    if delta.sequence != sequence:
+        raise ValueError(f"Expect delta {sequence}, receive delta {delta.sequence}")
+
+    robot.HP = delta.HP
+    robot.armor = delta.armor
+    if delta.pos is not None:
+        robot.set_pos(Grid(None, delta.pos))
+    if delta.states is not None:
+        robot.states.decode(delta.states)
+    if delta.gadget_remain is not None:
+        for gadget, remain in zip(robot.gadgets, delta.gadget_remain):
+            gadget.remain = remain
+    robot.info_list = decode_infos(delta.info)
+    robot.vision = delta.vision
+    # the map logs the changes of the latest delta, the grids to redraw
+    robot.map.clear_changes()
+    for x, y, mark in delta.map_changes:
+        robot.map.set(x, y, mark)
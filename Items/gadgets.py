@@ -6,6 +6,8 @@ from Framework import interface
 from Framework import input_code
 from Items import prompt_template as prompt
 import damage as dmg
+from robot_state import StateType, state_mask
+from robot_info import InfoEvent, InfoKind
 
 
 """
@@ -258,13 +260,13 @@ gadget objects
 
 def deployable_barricade_effect(gadget, battlefield, x, y):
     if battlefield.is_blocked(x, y):
-        return 'Deployment failed: the location has been blocked'
+        return InfoEvent(InfoKind.DEPLOY_BLOCKED)
 
     grid = battlefield.get_grid(x, y)
     import barricade
     grid.change_occupant(barricade.HardBarricade(gadget.config.HP, gadget.config.armor, grid))
 
-    return f'Deploy barricade at ({x}, {y})'
+    return InfoEvent(InfoKind.DEPLOYED, (x, y))
 
 
 # gadget objects
@@ -281,11 +283,11 @@ deployable_barricade = DeployableGadget(
 
 
 # the effects of EMP bomb
+EMP_MASK = state_mask(StateType.MOVE, StateType.SENSOR, StateType.WEAPON, StateType.GADGET)
+
+
 def EMP_effect(target):
-    target.states.set_state("move", False, 1)
-    target.states.set_state("sensor", False, 1)
-    target.states.set_state("weapon", False, 1)
-    target.states.set_state("gadget", False, 1)
+    target.states.apply_effect(EMP_MASK, False, 1)
 
 
 EMP_bomb = ProjectileGadget(
@@ -304,10 +306,12 @@ EMP_bomb = ProjectileGadget(
 
 
 # the effects of flash bomb
+FLASH_MASK = state_mask(StateType.VISION, StateType.SENSOR)
+
+
 def flash_effect(target):
-    target.states.set_state("vision", False, 2)
-    target.states.set_state("sensor", False, 2)
-    target.states.set_state("weapon", False, 1)
+    target.states.apply_effect(FLASH_MASK, False, 2)
+    target.states.set_state(StateType.WEAPON, False, 1)
 
 
 flash_bomb = ProjectileGadget(
@@ -5,6 +5,7 @@ from dataclasses import dataclass
 from Framework import interface
 from Framework import input_code
 from Items import prompt_template as prompt
+from robot_info import InfoEvent, InfoKind
 
 
 @dataclass(frozen=True)
@@ -35,9 +36,7 @@ class SoundSensor(interface.ISensor):
         :return: None
         """
         sound_signal = sensors.display_signal_vision(robot.get_pos()[0], robot.get_pos()[1], self)
-        robot.receive_info("Sound signal detected at (" + str(robot.get_pos()[0]) + ", " + str(robot.get_pos()[1]) + ")")
-        robot.receive_info("Sound signal: ")
-        robot.receive_info(sound_signal)
+        robot.receive_info(InfoEvent(InfoKind.SOUND_SIGNAL, robot.get_pos(), sound_signal))
 
     def select_sensor_parameter(self):
         """
@@ -64,9 +63,7 @@ class HeatSensor(interface.ISensor):
         :return: None
         """
         heat_signal = sensors.display_signal_vision(robot.get_pos()[0], robot.get_pos()[1], self)
-        robot.receive_info("Heat signal detected at (" + str(robot.get_pos()[0]) + ", " + str(robot.get_pos()[1]) + ")")
-        robot.receive_info("Heat signal: ")
-        robot.receive_info(heat_signal)
+        robot.receive_info(InfoEvent(InfoKind.HEAT_SIGNAL, robot.get_pos(), heat_signal))
 
     def select_sensor_parameter(self):
         """
@@ -109,8 +106,7 @@ class Lidar(interface.ISensor):
         :return: None
         """
         lidar_view = sensors.display_lidar_vision(robot.get_pos()[0], robot.get_pos()[1], self)
-        robot.receive_info("Complete lidar scanning at (" + str(robot.get_pos()[0]) + ", " + str(robot.get_pos()[1]) + ")")
-        robot.receive_info(lidar_view)
+        robot.receive_info(InfoEvent(InfoKind.LIDAR_SCAN, robot.get_pos(), lidar_view))
         robot.update_map(lidar_view)
 
     def select_sensor_parameter(self):
@@ -158,8 +154,7 @@ class Drone(interface.ISensor):
         :return: None
         """
         drone_view = sensors.display_drone_vision(robot.get_pos()[0], robot.get_pos()[1], self)
-        robot.receive_info("Drone scanning at (" + str(drone_view[1][0]) + ", " + str(drone_view[1][1]) + ")")
-        robot.receive_info(drone_view[0])
+        robot.receive_info(InfoEvent(InfoKind.DRONE_SCAN, drone_view[1], drone_view[0]))
         robot.update_map(drone_view[0])
 
     def select_sensor_parameter(self):
@@ -215,8 +210,7 @@ class ScoutCar(interface.ISensor):
         :return: None
         """
         scout_car_view = sensors.display_scout_car_vision(robot.get_pos()[0], robot.get_pos()[1], self)
-        robot.receive_info("Scout car scanning at (" + str(scout_car_view[1][0]) + ", " + str(scout_car_view[1][1]) + ")")
-        robot.receive_info(scout_car_view[0])
+        robot.receive_info(InfoEvent(InfoKind.SCOUT_CAR_SCAN, scout_car_view[1], scout_car_view[0]))
         robot.update_map(scout_car_view[0])
 
     def select_sensor_parameter(self):
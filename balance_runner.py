@@ -0,0 +1,281 @@
+"""
+Monte Carlo balance runner
+
+Play many independent headless games across a pool of processes. Each game
+has its own seed and loadout assignment, and players follow a random policy.
+The outcome of each game is streamed back and aggregated into a report of
+win rate, damage dealt by each weapon and rounds survived by each loadout
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(current_dir, 'Framework'))
+
+import copy
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+
+from simulator import Simulator
+from Configurations.robot_config import default_config
+from Framework import message
+from Framework.message import Message
+import Items.weapons as weapons
+
+
+@dataclass
+class GameJob:
+    """
+    A game to play
+
+        - seed: the seed of the game
+        - loadouts: the name of the loadout of each player, in player id order
+        - policy_seed: the seed of the random commands, independent of the seed of the game
+    """
+    seed: int
+    loadouts: tuple
+    policy_seed: int
+
+
+@dataclass
+class GameOutcome:
+    """
+    The outcome of a game
+
+        - seed: the seed of the game
+        - loadouts: the name of the loadout of each player, in player id order
+        - winner: the index of the winning player in loadouts, None if no single player survives
+        - rounds: the number of rounds played
+        - rounds_survived: the number of rounds each player survived, in player id order
+        - weapon_damage: the damage dealt to other players by each weapon, name: damage
+    """
+    seed: int
+    loadouts: tuple
+    winner: int
+    rounds: int
+    rounds_survived: tuple
+    weapon_damage: dict
+
+
+@dataclass
+class BalanceReport:
+    """
+    The aggregated outcomes of the games played
+
+        - games: the number of games played
+        - games_played: the number of times each loadout is played, name: count
+        - wins: the number of wins of each loadout, name: count
+        - rounds_survived: the total rounds survived by each loadout, name: rounds
+        - weapon_damage: the total damage dealt by each weapon, name: damage
+    """
+    games: int = 0
+    games_played: dict = field(default_factory=dict)
+    wins: dict = field(default_factory=dict)
+    rounds_survived: dict = field(default_factory=dict)
+    weapon_damage: dict = field(default_factory=dict)
+
+    def add(self, outcome: GameOutcome) -> None:
+        """
+        Add the outcome of one game to the report
+
+        :param outcome: the outcome of the game
+        :return: None
+        """
+        self.games += 1
+        for i, loadout in enumerate(outcome.loadouts):
+            self.games_played[loadout] = self.games_played.get(loadout, 0) + 1
+            self.rounds_survived[loadout] = self.rounds_survived.get(loadout, 0) + outcome.rounds_survived[i]
+            if outcome.winner == i:
+                self.wins[loadout] = self.wins.get(loadout, 0) + 1
+        for name, damage in outcome.weapon_damage.items():
+            self.weapon_damage[name] = self.weapon_damage.get(name, 0) + damage
+
+    def win_rate(self, loadout: str) -> float:
+        """
+        :param loadout: the name of the loadout
+        :return: the proportion of games won by the loadout
+        """
+        return self.wins.get(loadout, 0) / max(1, self.games_played.get(loadout, 0))
+
+    def summary(self) -> str:
+        """
+        Return a string representation of the report
+
+        :return: one line for each loadout and weapon
+        """
+        lines = [f"{self.games} games"]
+        for loadout in sorted(self.games_played):
+            average_rounds = self.rounds_survived[loadout] / self.games_played[loadout]
+            lines.append(f"{loadout}: win rate {self.win_rate(loadout):.3f}  rounds survived {average_rounds:.1f}")
+        for name in sorted(self.weapon_damage):
+            lines.append(f"{name}: damage {self.weapon_damage[name]}")
+        return '\n'.join(lines)
+
+
+def random_command(robot, rng: random.Random) -> Message:
+    """
+    Return a random command of a living robot, as a client would send
+
+    :param robot: the robot to command
+    :param rng: the random numbers of the policy
+    :return: the command message
+    """
+    player_id = robot.get_id()
+    direction = rng.randint(message.UP, message.RIGHT)
+    command_type = rng.random()
+    if command_type < 0.4:
+        return Message(player_id, message.TYPE_MOVE, message.MOVE, direction, robot.move_speed)
+    if command_type < 0.8:
+        index = rng.randrange(len(robot.weapons))
+        weapon = copy.copy(robot.weapons[index])
+        weapon.direction = direction
+        if isinstance(weapon, weapons.ProjectileWeapon):
+            weapon.range = rng.randint(weapon.config.min_launch_range, weapon.config.max_launch_range)
+        return Message(player_id, message.TYPE_FIRE, index, weapon, weapon.config.reaction_time)
+    if command_type < 0.9:
+        index = rng.randrange(len(robot.gadgets))
+        gadget = copy.copy(robot.gadgets[index])
+        if gadget.check_remaining_use():
+            gadget.direction = direction
+            if hasattr(gadget.config, 'max_launch_range'):
+                gadget.range = rng.randint(gadget.config.min_launch_range, gadget.config.max_launch_range)
+            return Message(player_id, message.TYPE_GADGET, index, gadget, gadget.config.reaction_time)
+    # the cheapest sensor does not need additional parameters
+    return Message(player_id, message.TYPE_SENSE, 0, robot.sensors[0], 0)
+
+
+def play_game(job: GameJob, loadouts: dict, max_rounds: int) -> GameOutcome:
+    """
+    Play one game with random commands
+
+    :param job: the game to play
+    :param loadouts: the robot configuration of each loadout, name: RobotConfig
+    :param max_rounds: the maximum number of rounds in the game
+    :return: the outcome of the game
+    """
+    simulator = Simulator([loadouts[name] for name in job.loadouts], seed=job.seed)
+    game = simulator.game
+    rng = random.Random(job.policy_seed)
+    rounds_survived = {}
+    weapon_damage = {}
+    last_HP = {player_id: player.HP for player_id, player in game.players.items()}
+
+    def record_damage(player_message: Message) -> None:
+        # attribute the HP lost by other players to the weapon just fired
+        for player_id, player in game.players.items():
+            lost = last_HP[player_id] - player.HP
+            last_HP[player_id] = player.HP
+            if lost > 0 and player_message.type == message.TYPE_FIRE and player_id != player_message.source:
+                name = player_message.data.config.name
+                weapon_damage[name] = weapon_damage.get(name, 0) + lost
+
+    game.message_center.listeners.append(record_damage)
+
+    rounds = 0
+    left = set()  # the players who left the game
+    while rounds < max_rounds and len(simulator.living_players()) > 1:
+        commands = []
+        for player_id, player in game.players.items():
+            if player_id in left:
+                continue
+            if not player.get_state("alive"):
+                # dead players leave the game, as the client does
+                commands.append(Message(player_id, message.TYPE_DISCONNECT, message.DISCONNECT, None, -1))
+                rounds_survived[player_id] = rounds
+                left.add(player_id)
+            else:
+                commands.append(random_command(player, rng))
+        simulator.step(commands)
+        rounds += 1
+
+    # the players still in the game survived every round played, including those destroyed in the last round
+    for player_id in game.players:
+        if player_id not in left:
+            rounds_survived[player_id] = rounds
+    living = simulator.living_players()
+    winner = living[0].get_id() - 1 if len(living) == 1 else None
+    return GameOutcome(job.seed, job.loadouts, winner, rounds, tuple(rounds_survived[i] for i in sorted(rounds_survived)), weapon_damage)
+
+
+# the arguments of games in a worker process, set once by the pool initializer
+_worker_loadouts = None
+_worker_max_rounds = None
+
+
+def _initialize_worker(loadouts: dict, max_rounds: int) -> None:
+    """
+    Store the loadouts in the worker process, so they are not sent with every game
+    """
+    global _worker_loadouts, _worker_max_rounds
+    _worker_loadouts = loadouts
+    _worker_max_rounds = max_rounds
+
+
+def _play_job(job: GameJob) -> GameOutcome:
+    """
+    Play a game in a worker process
+    """
+    return play_game(job, _worker_loadouts, _worker_max_rounds)
+
+
+def make_jobs(loadout_names: list[str], num_games: int, players_per_game: int, base_seed: int = 0) -> list[GameJob]:
+    """
+    Assign a seed, random loadouts and a seed of the random commands to each game
+
+    The game seeds its GameRandom with its own seed, so the commands are drawn
+    from a separate stream, otherwise they would repeat the rolls of the game
+
+    :param loadout_names: the names of the loadouts to choose from
+    :param num_games: the number of games
+    :param players_per_game: the number of players in each game
+    :param base_seed: the seed of the first game, and of the loadout assignment
+    :return: the games to play
+    """
+    rng = random.Random(base_seed)
+    policy_rng = random.Random(f"policy-{base_seed}")
+    return [GameJob(base_seed + i, tuple(rng.choice(loadout_names) for _ in range(players_per_game)), policy_rng.getrandbits(32))
+            for i in range(num_games)]
+
+
+def run_games(jobs: list[GameJob], loadouts: dict, max_rounds: int = 200, workers: int = None):
+    """
+    Play the games across a pool of processes, and yield each outcome as it is ready
+
+    :param jobs: the games to play
+    :param loadouts: the robot configuration of each loadout, name: RobotConfig
+    :param max_rounds: the maximum number of rounds in each game
+    :param workers: the number of processes, the number of CPUs by default
+    :return: an iterator of the outcomes, in the order of jobs
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, len(jobs) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker, initargs=(loadouts, max_rounds)) as executor:
+        yield from executor.map(_play_job, jobs, chunksize=chunk_size)
+
+
+def run_balance(loadouts: dict, num_games: int, players_per_game: int = 3, max_rounds: int = 200,
+                workers: int = None, base_seed: int = 0) -> BalanceReport:
+    """
+    Play num_games games with random loadouts and aggregate their outcomes
+
+    :param loadouts: the robot configuration of each loadout, name: RobotConfig
+    :param num_games: the number of games
+    :param players_per_game: the number of players in each game
+    :param max_rounds: the maximum number of rounds in each game
+    :param workers: the number of processes, the number of CPUs by default
+    :param base_seed: the seed of the first game
+    :return: the aggregated report
+    """
+    report = BalanceReport()
+    jobs = make_jobs(sorted(loadouts), num_games, players_per_game, base_seed)
+    for outcome in run_games(jobs, loadouts, max_rounds, workers):
+        report.add(outcome)
+    return report
+
+
+if __name__ == '__main__':
+    # compare the straight-firing weapons, each loadout carries one of them
+    straight_weapons = [weapons.assulter_rifle, weapons.submachine_gun, weapons.pistol, weapons.sniper_rifle, weapons.shotgun]
+    weapon_loadouts = {weapon.config.name: replace(default_config, weapons=[weapon]) for weapon in straight_weapons}
+    print(run_balance(weapon_loadouts, num_games=int(sys.argv[1]) if len(sys.argv) > 1 else 200).summary())
@@ -10,11 +10,14 @@ HP from weapon shot. Player cannot move to a grid occupied by a hard barricade
 """
 from Framework.interface import IDisplayable, IDamageable
 from damage import Damage
+import grid as grid_kind
 from grid import Grid
 
 
 class Barricade(IDisplayable, IDamageable):
 
+    kind = grid_kind.BARRICADE
+
     def __init__(self, grid: Grid) -> None:
         self.grid = grid
 
@@ -42,9 +45,20 @@ class Barricade(IDisplayable, IDamageable):
         """
         return 'barricade'
 
+    def clone(self, grid: Grid):
+        """
+        Return a copy of the barricade at grid, used when the battlefield is forked
+
+        :param grid: the grid of the copy
+        :return: the copy of the barricade
+        """
+        return Barricade(grid)
+
 
 class HardBarricade(IDisplayable, IDamageable):
 
+    kind = grid_kind.HARD_BARRICADE
+
     def __init__(self, hp: int, armor: int, grid: Grid) -> None:
         self.HP = hp
         self.armor = armor
@@ -80,3 +94,12 @@ class HardBarricade(IDisplayable, IDamageable):
         :return: 'hard barricade'
         """
         return 'hard barricade'
+
+    def clone(self, grid: Grid):
+        """
+        Return a copy of the hard barricade at grid, used when the battlefield is forked
+
+        :param grid: the grid of the copy
+        :return: the copy of the hard barricade
+        """
+        return HardBarricade(self.HP, self.armor, grid)
@@ -1,11 +1,14 @@
 """
-The battlefield in the game, consisting a 2D list of grids
+The battlefield in the game, consisting of layers of heat, sound and occupancy
 """
-import random
-import math
+from array import array
 
+import grid as grid_kind
 from grid import Grid
-from Framework.interface import IDisplayable
+from signal_layer import SignalLayer
+from spatial_index import SpatialIndex, LineIndex
+from game_random import GameRandom
+from Framework.interface import IDisplayable, IDamageable
 from barricade import Barricade
 from barricade import HardBarricade
 from robot import Robot
@@ -13,15 +16,87 @@ from robot import Robot
 
 class Battlefield(IDisplayable):
 
-    def __init__(self, rows: int, columns: int) -> None:
+    def __init__(self, rows: int, columns: int, rng: GameRandom = None, verbose: bool = True) -> None:
         """
-        Create a new empty 2D list consisting of empty Grid
+        Create a new empty battlefield
+
+        Heat, sound and the kind of occupant are stored in dense layers with
+        one entry per grid, the occupant objects are stored in a sparse table
 
         :param rows: the num of rows in the battlefield
         :param columns: the num of colomns in the battlefield
+        :param rng: the random numbers of the game, a new generator if None
+        :param verbose: whether to print debugging messages to console
+        """
+        self.rows = rows
+        self.columns = columns
+        self.rng = rng if rng is not None else GameRandom()
+        self.verbose = verbose
+        self.clear()
+
+    def clear(self) -> None:
         """
-        # create new empty grid
-        self.field = [[Grid((j, i)) for j in range(0, columns)] for i in range(0, rows)]
+        Remove all occupants and signals from the battlefield
+
+        :return: None
+        """
+        rows, columns = self.rows, self.columns
+        self.heat = SignalLayer(rows, columns)  # the heat layer
+        self.sound = SignalLayer(rows, columns)  # the sound layer
+        self.kinds = array('b', bytes(rows * columns))  # the occupancy kind of each grid
+        self.shared_kinds = False  # whether kinds is shared with a forked battlefield
+        # the occupant objects, (x, y): occupant. The occupants changed since the last
+        # fork are stored over the occupants shared with the forks, None if removed
+        self.occupants = {}
+        self.shared_occupants = {}
+        self.damageables = SpatialIndex()  # the positions of damageable occupants
+        self.lines = LineIndex()  # the occupied positions along each row and column
+
+    def fork(self, rng: GameRandom = None, verbose: bool = False):
+        """
+        Return a copy of the battlefield for exploring a branch of the game
+
+        Nothing is copied when forking. The sound, heat, occupancy kinds and
+        indexes are shared until either battlefield writes them. The
+        occupants are shared as well, each battlefield stores the occupants it
+        places or removes over the shared ones, and copies a shared barricade
+        when get_occupant returns it. Robots are not copied, the caller places
+        its own robots on the copy
+
+        The occupants changed since the last fork are merged into the shared
+        occupants when the battlefield is forked again
+
+        :param rng: the random numbers of the copy
+        :param verbose: whether the copy prints debugging messages to console
+        :return: the copy of the battlefield
+        """
+        if self.occupants:
+            if self.shared_occupants:
+                shared = dict(self.shared_occupants)
+                for pos, occupant in self.occupants.items():
+                    if occupant is None:
+                        del shared[pos]
+                    else:
+                        shared[pos] = occupant
+                self.shared_occupants = shared
+            else:
+                self.shared_occupants = self.occupants
+            self.occupants = {}
+
+        field = Battlefield.__new__(Battlefield)
+        field.rows = self.rows
+        field.columns = self.columns
+        field.rng = rng if rng is not None else GameRandom()
+        field.verbose = verbose
+        field.heat = self.heat.fork()
+        field.sound = self.sound.fork()
+        field.kinds = self.kinds
+        field.shared_kinds = self.shared_kinds = True
+        field.occupants = {}
+        field.shared_occupants = self.shared_occupants
+        field.damageables = self.damageables.fork()
+        field.lines = self.lines.fork()
+        return field
 
     def initialize_field(self, barricade_coverage: float, hard_barricade_coverage: float,
                          barricade_HP_range: tuple, barricade_armor_range: tuple) -> None:
@@ -41,16 +116,17 @@ class Battlefield(IDisplayable):
         :param barricade_armor_range: the range of armor for hard barricade
         :return: None
         """
-        for row in self.field:
-            for grid in row:
-                random_temp = random.random()
+        for y in range(0, self.rows):
+            for x in range(0, self.columns):
+                grid = Grid(self, (x, y))
+                random_temp = self.rng.random()
                 set_barricade = random_temp <= barricade_coverage
                 set_hard_barricade = random_temp <= hard_barricade_coverage
                 if not grid.get_occupant() and set_barricade:  # cover an empty grid
                     if set_hard_barricade:
                         # set up hard barricade with random HP and armor in range
-                        HP_range = random.randint(barricade_HP_range[0], barricade_HP_range[1])
-                        armor_range = random.randint(barricade_armor_range[0], barricade_armor_range[1])
+                        HP_range = self.rng.randint(barricade_HP_range[0], barricade_HP_range[1])
+                        armor_range = self.rng.randint(barricade_armor_range[0], barricade_armor_range[1])
                         grid.change_occupant(HardBarricade(HP_range, armor_range, grid))
                     else:
                         # set up barricade
@@ -69,9 +145,9 @@ class Battlefield(IDisplayable):
         trail = 0
         while not fixed:
             trail += 1
-            row = random.randint(0, len(self.field) - 1)
-            col = random.randint(0, len(self.field[0]) - 1)
-            grid = self.field[row][col]
+            row = self.rng.randint(0, self.rows - 1)
+            col = self.rng.randint(0, self.columns - 1)
+            grid = Grid(self, (col, row))
             if grid.get_occupant() is None:  # find empty grid
                 grid.change_occupant(player)
                 player.set_pos(grid)
@@ -88,13 +164,125 @@ class Battlefield(IDisplayable):
 
         :param x: the x-coordinate of grid
         :param y: the y-ccordinate of grid
-        :return: field[y][x]
+        :return: the grid at (x, y)
         """
-        if y < 0 or y >= len(self.field) or x < 0 or x >= len(self.field[0]):
-            print("grid index out of bound")
+        if y < 0 or y >= self.rows or x < 0 or x >= self.columns:
+            if self.verbose:
+                print("grid index out of bound")
             return None
 
-        return self.field[y][x]
+        return Grid(self, (x, y))
+
+    def get_occupant(self, x: int, y: int):
+        """
+        Return the occupant at (x, y), None if the grid is empty
+
+        A barricade shared with a forked battlefield is copied when it is
+        first returned, so it can be damaged or removed
+
+        :param x: the x-coordinate of grid
+        :param y: the y-ccordinate of grid
+        :return: the occupant of the grid
+        """
+        occupant = self.occupants.get((x, y), self)
+        if occupant is not self:
+            return occupant
+
+        occupant = self.shared_occupants.get((x, y))
+        if isinstance(occupant, (Barricade, HardBarricade)):
+            occupant = occupant.clone(Grid(self, (x, y)))
+            self.occupants[(x, y)] = occupant
+        return occupant
+
+    def occupant_items(self) -> list[tuple]:
+        """
+        Return all occupants on the battlefield, ordered by position
+
+        The occupants may be shared with a forked battlefield, use
+        get_occupant to get an occupant to change
+
+        :return: the (x, y) and occupant of each occupied grid
+        """
+        occupants = dict(self.shared_occupants)
+        occupants.update(self.occupants)
+        return sorted((pos, occupant) for pos, occupant in occupants.items() if occupant is not None)
+
+    def get_kind(self, x: int, y: int) -> int:
+        """
+        Return the occupancy kind at (x, y), defined in grid
+
+        :param x: the x-coordinate of grid
+        :param y: the y-ccordinate of grid
+        :return: the occupancy kind of the grid
+        """
+        return self.kinds[y * self.columns + x]
+
+    def change_occupant(self, x: int, y: int, occupant) -> None:
+        """
+        Place an occupant at (x, y), replacing the existing occupant
+
+        To remove the occupant in the grid, pass None as occupant
+
+        :param x: the x-coordinate of grid
+        :param y: the y-ccordinate of grid
+        :param occupant: the occupant added on the grid
+        :return: None
+        """
+        if occupant is None:
+            self.remove_occupant(x, y)
+            return
+
+        if self.shared_kinds:
+            self.unshare_kinds()
+        if self.kinds[y * self.columns + x] == grid_kind.EMPTY:
+            self.lines.add(x, y)
+        self.occupants[(x, y)] = occupant
+        self.kinds[y * self.columns + x] = occupant.kind
+        if isinstance(occupant, IDamageable):
+            self.damageables.add(x, y)
+        else:
+            self.damageables.remove(x, y)
+
+    def remove_occupant(self, x: int, y: int) -> None:
+        """
+        Clear the occupant at (x, y)
+
+        :param x: the x-coordinate of grid
+        :param y: the y-ccordinate of grid
+        :return: None
+        """
+        if self.shared_kinds:
+            self.unshare_kinds()
+        if self.kinds[y * self.columns + x] != grid_kind.EMPTY:
+            self.lines.remove(x, y)
+        if (x, y) in self.shared_occupants:
+            self.occupants[(x, y)] = None  # hide the shared occupant
+        else:
+            self.occupants.pop((x, y), None)
+        self.kinds[y * self.columns + x] = grid_kind.EMPTY
+        self.damageables.remove(x, y)
+
+    def unshare_kinds(self) -> None:
+        """
+        Copy the occupancy kinds shared with a forked battlefield before writing them
+
+        :return: None
+        """
+        self.kinds = array('b', self.kinds)
+        self.shared_kinds = False
+
+    def get_damageables_in_range(self, x: int, y: int, radius: int) -> list[tuple]:
+        """
+        Return the damageable occupants within radius of (x, y)
+
+        The occupants are ordered by x-coordinate, then by y-coordinate
+
+        :param x: the x-coordinate of the center
+        :param y: the y-coordinate of the center
+        :param radius: the radius of the circle
+        :return: the (x, y, occupant) of each damageable occupant in range
+        """
+        return [(px, py, self.get_occupant(px, py)) for px, py in self.damageables.query_circle(x, y, radius)]
 
     def is_blocked(self, x: int, y: int) -> bool:
         """
@@ -108,10 +296,11 @@ class Battlefield(IDisplayable):
         :return: whether the grid is blocked
         """
         # check out-of-bound cases
-        if self.get_grid(x, y) is None:
+        if not (0 <= x < self.columns and 0 <= y < self.rows):
             return True
 
-        return self.get_grid(x, y).display() == '#' or self.get_grid(x, y).display() == 'R'
+        kind = self.kinds[y * self.columns + x]
+        return kind == grid_kind.HARD_BARRICADE or kind == grid_kind.ROBOT
 
     def is_occupied(self, x: int, y: int) -> bool:
         """
@@ -123,51 +312,82 @@ class Battlefield(IDisplayable):
         :param y: the y-ccordinate of grid
         :return: whether the grid is occupied
         """
-        if self.get_grid(x, y) is None:
+        if not (0 <= x < self.columns and 0 <= y < self.rows):
             return True
 
-        return not self.get_grid(x, y).display() == '_'
+        return self.kinds[y * self.columns + x] != grid_kind.EMPTY
+
+    def first_occupied(self, x: int, y: int, dx: int, dy: int, max_distance: int):
+        """
+        Return the distance from (x, y) to the first occupied grid in direction (dx, dy)
+        Return None if no grid within max_distance is occupied
+
+        Preconditions:
+            - (dx, dy) in [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+        :param x: the x-coordinate of the starting point
+        :param y: the y-coordinate of the starting point
+        :param dx: the step of x-coordinate
+        :param dy: the step of y-coordinate
+        :param max_distance: the maximum distance to search
+        :return: the distance to the first occupied grid
+        """
+        distance = self.lines.next_occupied(x, y, dx, dy)
+        if distance is None or distance > max_distance:
+            return None
+        return distance
 
     def generate_heat(self, x: int, y: int, intensity: int) -> None:
         """
         Generate heat signal from a given coordinate (x, y)
 
+        The signal is buffered with the other signals in the round, and
+        is resolved before the heat is read
+
         Preconditions:
-            - 0 <= x < len(self.field[0])
-            - 0 <= y < len(self.field)
+            - 0 <= x < self.columns
+            - 0 <= y < self.rows
 
         :param x: the x-coordinate of the heat source
         :param y: the y-coordinate of the heat source
         :param intensity: the intensity of the heat
         :return: None
         """
-        for field_row in self.field:
-            for grid in field_row:
-                px, py = grid.get_pos()
-                grid.change_heat(max(intensity - int(math.sqrt((x - px) ** 2 + (y - py) ** 2)), 0))
+        self.heat.emit(x, y, intensity)
 
     def generate_sound(self, x: int, y: int, intensity: int) -> None:
         """
         Generate sound signal from a given coordinate (x, y)
 
+        The signal is buffered with the other signals in the round, and
+        is resolved before the sound is read
+
         Preconditions:
-            - 0 <= x < len(self.field[0])
-            - 0 <= y < len(self.field)
+            - 0 <= x < self.columns
+            - 0 <= y < self.rows
 
         :param x: the x-coordinate of the sound source
         :param y: the y-coordinate of the sound source
         :param intensity: the intensity of the sound
         :return: None
         """
-        for field_row in self.field:
-            for grid in field_row:
-                px, py = grid.get_pos()
-                grid.change_sound(max(intensity - int(math.sqrt((x - px) ** 2 + (y - py) ** 2)), 0))
+        self.sound.emit(x, y, intensity)
+
+    def resolve_signals(self) -> None:
+        """
+        Apply all buffered sound and heat signals to the field
+
+        :return: None
+        """
+        self.sound.resolve()
+        self.heat.resolve()
 
     def reduce_sound_and_heat(self, sound_reduction: int, heat_reduction: int) -> None:
         """
         Reduce the sound and heat intensity in the entire field
 
+        The reduction is applied lazily when each grid is read
+
         Preconditions:
             - sound_reduction >= 0
             - heat_reduction >= 0
@@ -176,10 +396,8 @@ class Battlefield(IDisplayable):
         :param heat_reduction: the amount of heat reduced
         :return: None
         """
-        for field_row in self.field:
-            for grid in field_row:
-                grid.change_sound(-sound_reduction)
-                grid.change_heat(-heat_reduction)
+        self.sound.reduce(sound_reduction)
+        self.heat.reduce(heat_reduction)
 
     def display(self) -> list[list[str]]:
         """
@@ -187,6 +405,7 @@ class Battlefield(IDisplayable):
 
         :return: a string representation of the battlefield
         """
-        return [[grid.display() for grid in row] for row in self.field]
+        glyphs = [grid_kind.GLYPHS[kind] for kind in self.kinds]
+        return [glyphs[i * self.columns:(i + 1) * self.columns] for i in range(0, self.rows)]
 
 
@@ -1,4 +1,5 @@
 from Framework import message
+from robot_info import InfoEvent, InfoKind
 
 
 class MoveController:
@@ -31,7 +32,7 @@ class MoveController:
 
         # check robot state
         if not robot.get_state("move"):
-            robot.receive_info("The robot's movement is interrupted!")
+            robot.receive_info(InfoEvent(InfoKind.MOVE_INTERRUPTED))
             return
 
         x, y = robot.get_pos()  # the player's current location
@@ -58,14 +59,14 @@ class MoveController:
         original_pos = robot.get_pos()
 
         if field.is_blocked(target_pos[0], target_pos[1]):
-            robot.receive_info("Movement failed, the location has been blocked")
+            robot.receive_info(InfoEvent(InfoKind.MOVE_BLOCKED))
             return
 
         # move the robot
         field.get_grid(target_pos[0], target_pos[1]).change_occupant(robot)
         field.get_grid(original_pos[0], original_pos[1]).change_occupant(None)
         robot.set_pos(field.get_grid(target_pos[0], target_pos[1]))
-        robot.receive_info("Move to (" + str(robot.get_pos()[0]) + ", " + str(robot.get_pos()[1]) + ")")
+        robot.receive_info(InfoEvent(InfoKind.MOVED, robot.get_pos()))
         # generate sound and heat signal
         field.generate_sound(target_pos[0], target_pos[1], robot.move_sound)
         field.generate_heat(target_pos[0], target_pos[1], robot.move_heat)
@@ -95,7 +96,7 @@ class SensorController:
 
         # check robot state
         if not robot.get_state("sensor"):
-            robot.receive_info("The robot's sensor is interrupted!")
+            robot.receive_info(InfoEvent(InfoKind.SENSOR_INTERRUPTED))
             return
 
         # use the sensor
@@ -129,7 +130,7 @@ class WeaponController:
 
         # check robot state
         if not robot.get_state("weapon"):
-            robot.receive_info("The robot's weapon is interrupted!")
+            robot.receive_info(InfoEvent(InfoKind.WEAPON_INTERRUPTED))
             return
 
         weapon.fire_weapon(self.game.weapons, robot)
@@ -163,7 +164,7 @@ class GadgetController:
 
         # check robot state
         if not robot.get_state("gadget"):
-            robot.receive_info("The robot's gadget is interrupted!")
+            robot.receive_info(InfoEvent(InfoKind.GADGET_INTERRUPTED))
             return
 
         # use gadget
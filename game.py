@@ -1,48 +1,74 @@
 """
 The class of a gameplay
 """
+import hashlib
+import itertools
+import random
+import struct
+from array import array
+
 import robot_weapons
 import robot_gadgets
 import robot_sensors
 from battlefield import Battlefield
+from grid import Grid
+from barricade import HardBarricade
+from game_random import GameRandom
+from journal import JournalWriter
+from snapshot import write_snapshot, read_snapshot
 from robot import Robot
+from robot_registry import RobotRegistry
+from robot_state import update_states
 from Framework import message
 from Framework.message import Message
-from Framework.event import Event
-from queue import PriorityQueue
-from Configurations import game_config
+from Framework.event import Event, make_event
+from Configurations.game_config import GameConfig, default_game_config
 from controllers import MoveController, SensorController, WeaponController, GadgetController
 
 
 class Game:
 
-    def __init__(self, game_id: int, num_players: int) -> None:
+    def __init__(self, game_id: int, num_players: int, seed=None, verbose: bool = True, use_registry: bool = False,
+                 config: GameConfig = default_game_config) -> None:
         """
         Initialize a game with players and a battlefield
 
         :param game_id: the game_id assigned by server
         :param num_players: the number of players to start a game
+        :param seed: the seed of the random numbers in the game, None to choose a random seed
+        :param verbose: whether to print the game status to console
+        :param use_registry: whether to store the status of robots in a RobotRegistry, for games with many robots
+        :param config: the configuration of the game
         """
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)  # the seed is kept to replay the game
+
         self.game_id = game_id
         self.round_count = 1
         self.num_players = num_players
-        self.battlefield = Battlefield(game_config.FIELD_ROW, game_config.FIELD_COL)
+        self.seed = seed
+        self.config = config
+        self.rng = GameRandom(seed)  # every random decision in the game draws from rng
+        self.verbose = verbose
+        self.battlefield = Battlefield(config.field_row, config.field_col, self.rng, verbose)
         self.event_handler = EventHandler(self)  # the event handler in the game
         self.sensors = robot_sensors.RobotSensor(self)  # the sensors in the game
         self.weapons = robot_weapons.RobotWeapons(self)  # the weapons in the game
         self.gadgets = robot_gadgets.RobotGadgets(self)  # the gadgets in the game
-        self.battlefield.initialize_field(game_config.BARRICADE_COVERAGE, game_config.HARD_BARRICADE_COVERAGE, game_config.BARRICADE_HP_RANGE,
-                                          game_config.BARRICADE_ARMOR_RANGE)
+        self.battlefield.initialize_field(config.barricade_coverage, config.hard_barricade_coverage, config.barricade_HP_range,
+                                          config.barricade_armor_range)
         self.players = {}  # the dict of all players
+        self.registry = RobotRegistry() if use_registry else None  # the status of all robots, None if robots store their own
         self.game_start = False  # whether the game as started
         self.game_update_counter = 0  # how many threads finish the round
+        self.journal = None  # the journal recording the game
 
-        # initialize message centers and controllers
-        self.message_center = MessageCenter(self)
+        # initialize controllers and message centers
         self.move_controller = MoveController(self)
         self.sensor_controller = SensorController(self)
         self.weapon_controller = WeaponController(self)
         self.gadget_controller = GadgetController(self)
+        self.message_center = MessageCenter(self)
 
     def add_player(self, player: Robot, player_id: int) -> None:
         """
@@ -51,13 +77,141 @@ class Game:
         :param player: the player in the game
         :param player_id: the id of player
         :return: None
+        :raise ValueError: if the player's map is not the size of the battlefield
         """
+        if (player.map.rows, player.map.columns) != (self.battlefield.rows, self.battlefield.columns):
+            raise ValueError("The robot is created for a different battlefield size")
         self.players[player_id] = player
+        player.rng = self.rng
         self.battlefield.initialize_player_location(player)
+        if self.registry is not None:
+            self.registry.register(player)
+        if self.journal is not None:
+            self.journal.record_player(player_id, player.robot_config)
         # start the game when there are enough players
         if len(self.players) == self.num_players:
             self.game_start = True
 
+    def start_journal(self, path: str) -> None:
+        """
+        Record the game in a journal file, starting from the players who already joined
+
+        :param path: the path of the journal file
+        :return: None
+        """
+        self.journal = JournalWriter(path, self.seed, self.config)
+        for player_id, player in self.players.items():
+            self.journal.record_player(player_id, player.robot_config)
+
+    def state_hash(self) -> bytes:
+        """
+        Return a hash of the game state
+
+        The hash covers the round count, the random numbers, the battlefield
+        layers, the hard barricades, and the HP, armor, position, states
+        and gadget uses of each player
+
+        :return: the hash of the game state
+        """
+        field = self.battlefield
+        size = field.rows * field.columns
+        state = hashlib.blake2b(digest_size=16)
+        state.update(struct.pack('<I', self.round_count))
+        state.update(repr(self.rng.getstate()).encode())
+        state.update(field.kinds.tobytes())
+        state.update(array('b', field.sound.current(0, size)).tobytes())
+        state.update(array('b', field.heat.current(0, size)).tobytes())
+        for pos, occupant in field.occupant_items():
+            if isinstance(occupant, HardBarricade):
+                state.update(struct.pack('<iii', pos[0], pos[1], occupant.HP))
+        for player_id in sorted(self.players):
+            player = self.players[player_id]
+            state.update(repr((player_id, player.HP, player.armor, player.get_pos(), player.states.encode(),
+                               [gadget.remain for gadget in player.gadgets])).encode())
+        return state.digest()
+
+    def snapshot(self) -> bytes:
+        """
+        Save the state of the game between rounds in a compact binary snapshot
+
+        :return: the snapshot
+        :raise ValueError: if a scheduled event has no registered name
+        """
+        return write_snapshot(self)
+
+    def restore(self, data: bytes) -> None:
+        """
+        Restore the state of the game from a snapshot
+
+        Preconditions:
+            - the game has the players of the game the snapshot was taken from
+
+        :param data: the snapshot from snapshot()
+        :return: None
+        :raise ValueError: if the snapshot is not valid for the game
+        """
+        read_snapshot(self, data)
+
+    def fork(self):
+        """
+        Return a copy of the game for exploring a branch between rounds,
+        the copy does not print to console or record a journal
+
+        The copy shares the unchanged parts of the battlefield and the robot
+        configurations with the game, and copies them when they change, so
+        playing rounds on the copy leaves the game untouched
+
+        :return: the copy of the game
+        :raise ValueError: if a scheduled event has no registered name
+        """
+        game = Game.__new__(Game)
+        game.game_id = self.game_id
+        game.round_count = self.round_count
+        game.num_players = self.num_players
+        game.seed = self.seed
+        game.config = self.config
+        game.rng = GameRandom()
+        game.rng.setstate(self.rng.getstate())
+        game.verbose = False
+        game.battlefield = self.battlefield.fork(game.rng)
+        game.event_handler = EventHandler(game)
+        game.sensors = robot_sensors.RobotSensor(game)
+        game.weapons = robot_weapons.RobotWeapons(game)
+        game.gadgets = robot_gadgets.RobotGadgets(game)
+        game.game_start = self.game_start
+        game.game_update_counter = 0
+        game.journal = None
+
+        game.players = {}
+        for player_id, player in self.players.items():
+            pos = player.get_pos()
+            robot = player.clone(Grid(game.battlefield, pos) if pos is not None else None)
+            robot.rng = game.rng
+            game.players[player_id] = robot
+            # replace the robot on the copy of the battlefield
+            if pos is not None and game.battlefield.get_occupant(pos[0], pos[1]) is player:
+                game.battlefield.change_occupant(pos[0], pos[1], robot)
+        game.registry = None
+        if self.registry is not None:
+            game.registry = RobotRegistry()
+            for player in self.registry.robots:
+                game.registry.register(game.players[player.player_id])
+
+        # callbacks are bound to the game, so events are rebuilt for the copy
+        for event in self.event_handler.scheduled():
+            if event.name is None:
+                raise ValueError("Only events with a registered name can be forked")
+            game.event_handler.receive_event(make_event(game, event.name, event.start_round, event.end_round,
+                                                        *event.args, target=event.target))
+
+        game.move_controller = MoveController(game)
+        game.sensor_controller = SensorController(game)
+        game.weapon_controller = WeaponController(game)
+        game.gadget_controller = GadgetController(game)
+        game.message_center = MessageCenter(game)
+        game.message_center.num_players = self.message_center.num_players
+        return game
+
     def get_player(self, player_id: int) -> Robot:
         """
         Return the corresponding player object with a given id
@@ -77,35 +231,45 @@ class Game:
         Reduce sound and heat intensity
         Reset robot info_list
         Reset robot vision
+        Start a new round of changes on robot maps
 
         :return: None
         """
         # reduce signal in battlefield
-        self.battlefield.reduce_sound_and_heat(game_config.SOUND_REDUCTION, game_config.HEAT_REDUCTION)
+        self.battlefield.reduce_sound_and_heat(self.config.sound_reduction, self.config.heat_reduction)
 
         for player_id in self.players:
-            # reset player information list and vision
+            # reset player information list, vision and map changes
             self.players[player_id].clear_info()
             self.players[player_id].vision = []
+            self.players[player_id].map.clear_changes()
             # refill robot gadgets after a certain number of rounds
-            if self.round_count % game_config.GADGET_RESTORE_PERIOD == 0:
+            if self.round_count % self.config.gadget_restore_period == 0:
                 self.players[player_id].refill_gadgets()
-            # update robot states
-            self.players[player_id].states.update_state()
+
+        # update robot states
+        if self.registry is not None:
+            self.registry.tick()
+        else:
+            update_states(player.states for player in self.players.values())
 
         # update events
         self.event_handler.execute_events(self.round_count)
 
         # ONLY FOR TESTING: print battlefield status
-        print_field(self.battlefield)
-        print('---')
-        print_sound(self.battlefield)
-        print('---')
-        print_heat(self.battlefield)
+        if self.verbose:
+            print_field(self.battlefield)
+            print('---')
+            print_sound(self.battlefield)
+            print('---')
+            print_heat(self.battlefield)
 
         # add round count
         self.round_count += 1
 
+        if self.journal is not None:
+            self.journal.record_hash(self.round_count - 1, self.state_hash())
+
     def reset_game_update(self) -> None:
         """
         Notify that one thread has finished sending client message,
@@ -130,6 +294,30 @@ class Game:
         robot.update_map(vision)
         robot.update_vision(vision)
 
+    def update_player_maps(self, player_ids=None) -> None:
+        """
+        Update the map and vision of players at the end of a round
+
+        The vision of every player is read from one snapshot of the occupancy
+        of the battlefield, so the maps do not depend on the order the players
+        are updated. Each player reads and updates only its vision window
+
+        :param player_ids: the ids of players to update, the players on the field if None
+        :return: None
+        """
+        field = self.battlefield
+        if player_ids is None:
+            player_ids = [player_id for player_id, player in self.players.items()
+                          if player.get_pos() is not None and field.get_occupant(*player.get_pos()) is player]
+
+        kinds = field.kinds.tobytes()  # the occupancy of the battlefield at the end of the round
+        for player_id in player_ids:
+            robot = self.players[player_id]
+            x, y = robot.get_pos()
+            vision = self.sensors.display_grid_helper(x, y, 1, kinds)
+            robot.update_map(vision)
+            robot.update_vision(vision)
+
     def remove_player(self, player_id: int) -> None:
         """
         Remove a player from the game
@@ -144,56 +332,105 @@ class Game:
 
 # test methods: print battlefield status to terminal
 def print_field(b):
-    for i in range(len(b.field)):
-        for j in range(len(b.field[0])):
-            print(b.field[i][j].display(), end="  ")
+    for row in b.display():
+        for element in row:
+            print(element, end="  ")
         print()  # Move to the next row
 
 
 def print_sound(b):
-    for i in range(len(b.field)):
-        for j in range(len(b.field[0])):
-            print(b.field[i][j].get_sound(), end="  ")
+    for row in b.sound.display():
+        for element in row:
+            print(element, end="  ")
         print()  # Move to the next row
 
 
 def print_heat(b):
-    for i in range(len(b.field)):
-        for j in range(len(b.field[0])):
-            print(b.field[i][j].get_heat(), end="  ")
+    for row in b.heat.display():
+        for element in row:
+            print(element, end="  ")
         print()  # Move to the next row
 
 
 class MessageCenter:
     """
     Store and distribute client commands
+
+    Each player's command in a round is kept in a buffer. When the round is
+    executed, the commands are ordered with a bucket sort over the bounded
+    priorities, so the order depends only on the priorities and player ids,
+    not on the order the commands arrive
     """
 
+    MIN_PRIORITY = -1  # the priority of disconnect commands
+    MAX_PRIORITY = 100  # the priority of commands with no reaction time
+
     def __init__(self, game):
         """
-        Initialize the message queue
+        Initialize the command buffer
 
         :param game: the game being played
         """
-        self.message_queue = PriorityQueue()
+        self.commands = {}  # the commands of the round, player_id: message
         self.game = game
 
         self.num_players = game.num_players
-        self.num_players_went = 0   # the number of players who made their moves
+        self.arrivals = itertools.count(1)  # the arrival tickets of the round, the last player to arrive executes the round
         self.complete_round = False    # whether all player moves have been executed
+        self.listeners = []  # the functions called with each message after it is executed
+        # the function executing each type of message
+        self.handlers = {message.TYPE_MOVE: game.move_controller.receive_message,
+                         message.TYPE_SENSE: game.sensor_controller.receive_message,
+                         message.TYPE_FIRE: game.weapon_controller.receive_message,
+                         message.TYPE_GADGET: game.gadget_controller.receive_message,
+                         message.TYPE_DISCONNECT: self.disconnect}
 
     def receive_message(self, player_message: Message) -> None:
         """
-        receive a message from server and put it in the message queue
+        receive a message from server and put it in the command buffer,
+        execute the round and update the maps of players when all players
+        sent their commands
+
+        Messages may be received from several threads. Taking an arrival
+        ticket is atomic, so exactly one thread executes the round
 
         :param player_message: the player message to receive
         :return: None
         """
-        self.complete_round = False
-        self.message_queue.put((-player_message.priority, player_message))
-        self.num_players_went += 1  # add one player who makes its move
-        if self.num_players_went == self.num_players:   # execute messages when all players made action
+        self.add_message(player_message)
+        if next(self.arrivals) == self.num_players:   # execute messages when all players made action
             self.execute_commands()
+            self.game.update_player_maps()
+            self.complete_round = True  # all player commands have been processed, time to send message to clients
+
+    def add_message(self, player_message: Message) -> None:
+        """
+        Put a player message in the command buffer without executing the round,
+        a later message from the same player in the round replaces it
+
+        The caller executes the round with execute_commands()
+
+        :param player_message: the player message to add
+        :return: None
+        """
+        self.complete_round = False
+        self.commands[player_message.source] = player_message
+
+    def order_commands(self, commands: dict) -> list[Message]:
+        """
+        Order the commands of a round by priority, from the highest to the lowest,
+        commands with the same priority are ordered by player id
+
+        Priorities out of range are treated as the nearest priority in range
+
+        :param commands: the commands of the round, player_id: message
+        :return: the commands in the order of execution
+        """
+        buckets = [[] for _ in range(self.MIN_PRIORITY, self.MAX_PRIORITY + 1)]
+        for player_id in sorted(commands):
+            priority = min(max(commands[player_id].priority, self.MIN_PRIORITY), self.MAX_PRIORITY)
+            buckets[self.MAX_PRIORITY - priority].append(commands[player_id])
+        return [player_message for bucket in buckets for player_message in bucket]
 
     def execute_commands(self) -> None:
         """
@@ -202,33 +439,47 @@ class MessageCenter:
 
         :return: None
         """
-        self.num_players_went = 0   # reset player movement count
+        # start a new round before executing, so commands of the next round are kept
+        commands, self.commands = self.commands, {}
+        self.arrivals = itertools.count(1)
 
-        while not self.message_queue.empty():
-            player_message = self.message_queue.get()[1]
+        commands = self.order_commands(commands)  # the commands in the order of execution
+        if self.game.journal is not None:
+            self.game.journal.record_round(self.game.round_count, commands)
+
+        for player_message in commands:
             # distribute the message to corresponding controllers
-            if player_message.type == message.TYPE_MOVE:
-                # send move message to MoveController
-                self.game.move_controller.receive_message(player_message)
-            elif player_message.type == message.TYPE_SENSE:
-                self.game.sensor_controller.receive_message(player_message)
-            elif player_message.type == message.TYPE_FIRE:
-                self.game.weapon_controller.receive_message(player_message)
-            elif player_message.type == message.TYPE_GADGET:
-                self.game.gadget_controller.receive_message(player_message)
-            elif player_message.type == message.TYPE_DISCONNECT:
-                self.num_players -= 1
-                self.game.remove_player(player_message.source)
-            else:
+            handler = self.handlers.get(player_message.type)
+            if handler is None:
                 print("Unidentified Message Type!")
+            else:
+                handler(player_message)
 
-        print('complete round')
-        self.complete_round = True  # all player commands have been processed, time to send message to clients
+            for listener in self.listeners:
+                listener(player_message)
+
+        if self.game.verbose:
+            print('complete round')
+
+    def disconnect(self, player_message: Message) -> None:
+        """
+        Remove the player who sends a disconnect message from the game
+
+        :param player_message: the disconnect message
+        :return: None
+        """
+        self.num_players -= 1
+        self.game.remove_player(player_message.source)
 
 
 class EventHandler:
     """
     The class that handles events
+
+    Events are kept in a timer wheel with one slot for each round. An event
+    is placed in the slot of the next round it runs, and moves to the slot
+    of the following round after it runs, until its end round. Scheduling,
+    running and cancelling an event all take constant time
     """
 
     def __init__(self, game):
@@ -238,26 +489,100 @@ class EventHandler:
         :param game: the game being played
         """
         self.game = game
-        self.event_queue = PriorityQueue()
+        self.wheel = {}  # the events to run in each round, in the order they are scheduled, round: [event]
+        self.targets = {}  # the scheduled events affecting each player, player_id: {id(event): event}
 
-    def receive_event(self, event: Event) -> None:
+    def receive_event(self, event: Event) -> Event:
         """
-        Receive an event and put it in the event queue
+        Schedule an event, an event starting in a past round runs from the current round
 
         :param event: the event to receive
+        :return: the event, which is the handle to cancel it
+        """
+        self.schedule(event, max(event.start_round, self.game.round_count))
+        if event.target is not None:
+            self.targets.setdefault(event.target, {})[id(event)] = event
+        return event
+
+    def schedule(self, event: Event, round_count: int) -> None:
+        """
+        Helper method, place an event in the slot of a round
+
+        :param event: the event to place
+        :param round_count: the round the event runs next
+        :return: None
+        """
+        if round_count in self.wheel:
+            self.wheel[round_count].append(event)
+        else:
+            self.wheel[round_count] = [event]
+
+    def cancel(self, event: Event) -> None:
+        """
+        Cancel a scheduled event, the event is removed from its slot when the slot is reached
+
+        :param event: the event from receive_event()
+        :return: None
+        """
+        event.cancelled = True
+        self.expire(event)
+
+    def expire(self, event: Event) -> None:
+        """
+        Helper method, stop tracking an event which will not run again
+
+        :param event: the event
         :return: None
         """
-        self.event_queue.put((event.start_round, event))
+        if event.target is not None and event.target in self.targets:
+            events = self.targets[event.target]
+            events.pop(id(event), None)
+            if not events:
+                del self.targets[event.target]
+
+    def get_events(self, player_id: int) -> list[Event]:
+        """
+        Return the scheduled events affecting a player
+
+        :param player_id: the id of player
+        :return: the events affecting the player, in the order they are scheduled
+        """
+        return list(self.targets.get(player_id, {}).values())
+
+    def scheduled(self) -> list[Event]:
+        """
+        Return all scheduled events
+
+        :return: the events, in the order they run
+        """
+        return [event for round_count in sorted(self.wheel) for event in self.wheel[round_count] if not event.cancelled]
+
+    def clear(self) -> None:
+        """
+        Remove all events
+
+        :return: None
+        """
+        self.wheel = {}
+        self.targets = {}
 
     def execute_events(self, round_count: int) -> None:
         """
         Execute events in the round
 
+        Events scheduled by a callback for the current round run in the same round
+
         :param round_count: the current round in the game
         """
         # execute events corresponding to the round
-        while not self.event_queue.empty() and self.event_queue.queue[0][0] <= round_count:
-            event_round, event = self.event_queue.get()
-            event.callback()
-            if round_count < event.end_round:
-                self.event_queue.put((event_round, event))
+        due = self.wheel.pop(round_count, None)
+        while due:
+            for event in due:
+                if event.cancelled:
+                    continue
+                event.callback()
+                if round_count < event.end_round and not event.cancelled:
+                    self.schedule(event, round_count + 1)
+                else:
+                    self.expire(event)
+            due = self.wheel.pop(round_count, None)
@@ -0,0 +1,56 @@
+"""
+The random numbers of a game
+
+Every game owns one GameRandom, and every random decision in the game draws
+from it. Games with the same seed are reproducible, and games in different
+threads or processes do not share random state
+"""
+import random
+
+
+class GameRandom(random.Random):
+    """
+    A seedable random number generator that draws rolls in batches
+    """
+
+    BATCH_SIZE = 256  # the number of rolls drawn at once
+
+    def seed(self, a=None, version: int = 2) -> None:
+        """
+        Seed the generator and discard the rolls drawn
+
+        :param a: the seed, None to seed from the system
+        :param version: the seeding algorithm of random.Random
+        :return: None
+        """
+        super().seed(a, version)
+        self.rolls = []
+
+    def roll(self) -> float:
+        """
+        Return a random float in [0, 1) for an accuracy or armor roll
+
+        Rolls are drawn BATCH_SIZE at a time
+
+        :return: the random float
+        """
+        if not self.rolls:
+            random_float = self.random
+            self.rolls = [random_float() for _ in range(self.BATCH_SIZE)]
+        return self.rolls.pop()
+
+    def getstate(self) -> tuple:
+        """
+        :return: the state of the generator, including the rolls drawn
+        """
+        return super().getstate(), tuple(self.rolls)
+
+    def setstate(self, state: tuple) -> None:
+        """
+        Restore the state of the generator from getstate()
+
+        :param state: the state of the generator
+        :return: None
+        """
+        super().setstate(state[0])
+        self.rolls = list(state[1])
@@ -1,22 +1,43 @@
 """
 A single grid in the game map
+
+The state of the grid is stored in the layers of the battlefield, a Grid
+object is a thin view of a location on the battlefield
 """
 from Framework import interface
 
 
+# occupancy kinds stored in the kind layer of the battlefield
+EMPTY = 0
+BARRICADE = 1
+HARD_BARRICADE = 2
+ROBOT = 3
+
+# the display of each occupancy kind, indexed by kind
+GLYPHS = ('_', 'x', '#', 'R')
+
+
 class Grid:
 
-    def __init__(self, pos: tuple) -> None:
+    __slots__ = ('battlefield', 'pos')
+
+    def __init__(self, battlefield, pos: tuple) -> None:
         """
-        Initialize the heat, sound, and occupant of the grid
+        Initialize a view of the grid at pos on the battlefield
 
+        :param battlefield: the battlefield storing the grid
         :param pos: the x and y coordinates of the grid
         """
-        self.heat = 0
-        self.sound = 0
-        self.occupant = None
+        self.battlefield = battlefield
         self.pos = pos
 
+    def __reduce__(self):
+        """
+        Pickle the grid with its position only, so sending a robot
+        does not send the entire battlefield
+        """
+        return Grid, (None, self.pos)
+
     def get_pos(self) -> tuple:
         """
         Return the grid's position in field
@@ -32,9 +53,7 @@ class Grid:
         :param value: the change in heat
         :return: None
         """
-        final_heat = self.heat + value
-        # constrain heat between 0 and 9
-        self.heat = max(min(final_heat, 9), 0)
+        self.battlefield.heat.change(self.pos[0], self.pos[1], value)
 
     def change_sound(self, value: int) -> None:
         """
@@ -43,9 +62,7 @@ class Grid:
         :param value: the change in sound
         :return: None
         """
-        final_sound = self.sound + value
-        # constrain heat between 0 and 9
-        self.sound = max(min(final_sound, 9), 0)
+        self.battlefield.sound.change(self.pos[0], self.pos[1], value)
 
     def change_occupant(self, occupant: interface.IDisplayable) -> None:
         """
@@ -56,25 +73,25 @@ class Grid:
         :param occupant: the occupant added on the grid
         :return: None
         """
-        self.occupant = occupant
+        self.battlefield.change_occupant(self.pos[0], self.pos[1], occupant)
 
     def get_sound(self) -> int:
         """
         :return: the sound in grid
         """
-        return self.sound
+        return self.battlefield.sound.get(self.pos[0], self.pos[1])
 
     def get_heat(self) -> int:
         """
         :return: the sound in grid
         """
-        return self.heat
+        return self.battlefield.heat.get(self.pos[0], self.pos[1])
 
     def get_occupant(self) -> interface.IDisplayable:
         """
         :return: the sound in grid
         """
-        return self.occupant
+        return self.battlefield.get_occupant(self.pos[0], self.pos[1])
 
     def remove_occupant(self) -> None:
         """
@@ -82,7 +99,7 @@ class Grid:
 
         :return: None
         """
-        self.occupant = None
+        self.battlefield.remove_occupant(self.pos[0], self.pos[1])
 
     def display(self) -> str:
         """
@@ -93,11 +110,6 @@ class Grid:
         '#': hard barricade
         'x': barricade
 
-        Invoke the 'display' method for IDisplayable objects
-
         :return: the string for occupant
         """
-        if not self.occupant:   # the occupant is None
-            return '_'
-        else:
-            return self.occupant.display()
+        return GLYPHS[self.battlefield.get_kind(self.pos[0], self.pos[1])]
@@ -0,0 +1,229 @@
+"""
+An append-only journal of a game
+
+The journal starts with the seed and configuration of the game, followed by the robot
+configuration of each player in the order they join. After each round,
+it records the ordered commands executed in the round and a hash of the
+game state at the end of the round, so the game can be replayed and
+checked round by round
+
+Each record is a 1-byte record type and a 4-byte payload length,
+followed by the payload
+"""
+import copy
+import pickle
+import struct
+from dataclasses import dataclass, field
+
+from Framework import message
+from Framework.message import Message
+
+JOURNAL_VERSION = 2  # increase when the format of records changes
+
+RECORD = struct.Struct('<BI')  # the type and payload length of a record
+# source, type, command, priority, data kind, direction, range, length of drone path
+COMMAND = struct.Struct('<iiiibiiH')
+
+# record types
+RECORD_HEADER = 1
+RECORD_PLAYER = 2
+RECORD_ROUND = 3
+RECORD_HASH = 4
+
+# kinds of message data
+DATA_NONE = 0
+DATA_DIRECTION = 1
+DATA_ITEM = 2
+
+
+def encode_command(player_message: Message) -> bytes:
+    """
+    Encode a command compactly
+
+    Items are not encoded, only the parameters the player selected for
+    them. They are restored from the robot's own items on replay
+
+    :param player_message: the command to encode
+    :return: the encoded command
+    """
+    data = player_message.data
+    path = b''
+    if data is None:
+        kind, direction, item_range = DATA_NONE, -1, -1
+    elif isinstance(data, int):
+        kind, direction, item_range = DATA_DIRECTION, data, -1
+    else:
+        kind, direction, item_range = DATA_ITEM, getattr(data, 'direction', -1), getattr(data, 'range', -1)
+        path = getattr(data, 'commands', '').encode()
+    return COMMAND.pack(player_message.source, player_message.type, player_message.command,
+                        player_message.priority, kind, direction, item_range, len(path)) + path
+
+
+def decode_commands(payload: bytes) -> list[tuple]:
+    """
+    Decode the commands of a round record
+
+    :param payload: the payload of the round record, after the round number
+    :return: the (source, type, command, priority, data kind, direction, range, drone path) of each command
+    """
+    commands = []
+    offset = 0
+    while offset < len(payload):
+        values = COMMAND.unpack_from(payload, offset)
+        offset += COMMAND.size
+        path = payload[offset:offset + values[-1]].decode()
+        offset += values[-1]
+        commands.append(values[:-1] + (path,))
+    return commands
+
+
+class JournalWriter:
+    """
+    Append the records of a game to a journal file
+    """
+
+    def __init__(self, path: str, seed, config) -> None:
+        """
+        Create a journal file and write its header
+
+        :param path: the path of the journal file
+        :param seed: the seed of the game
+        :param config: the GameConfig of the game
+        """
+        self.file = open(path, 'wb')
+        self.write(RECORD_HEADER, pickle.dumps((JOURNAL_VERSION, seed, config)))
+
+    def write(self, record_type: int, payload: bytes) -> None:
+        """
+        Append one record to the journal
+
+        :param record_type: the type of the record
+        :param payload: the payload of the record
+        :return: None
+        """
+        self.file.write(RECORD.pack(record_type, len(payload)))
+        self.file.write(payload)
+
+    def record_player(self, player_id: int, robot_config) -> None:
+        """
+        Record a player joining the game
+
+        :param player_id: the id of the player
+        :param robot_config: the configuration of the player's robot
+        :return: None
+        """
+        self.write(RECORD_PLAYER, pickle.dumps((player_id, robot_config)))
+        self.file.flush()
+
+    def record_round(self, round_count: int, commands: list[Message]) -> None:
+        """
+        Record the commands of a round, in the order they are executed
+
+        :param round_count: the round of the commands
+        :param commands: the commands executed
+        :return: None
+        """
+        self.write(RECORD_ROUND, struct.pack('<I', round_count) + b''.join(encode_command(command) for command in commands))
+
+    def record_hash(self, round_count: int, state_hash: bytes) -> None:
+        """
+        Record the game state hash at the end of a round
+
+        :param round_count: the round that ended
+        :param state_hash: the hash of the game state
+        :return: None
+        """
+        self.write(RECORD_HASH, struct.pack('<I', round_count) + state_hash)
+        self.file.flush()
+
+    def close(self) -> None:
+        """
+        Close the journal file
+
+        :return: None
+        """
+        self.file.close()
+
+
+@dataclass
+class Journal:
+    """
+    The content of a journal file
+
+        - seed: the seed of the game
+        - config: the GameConfig of the game
+        - players: the (player_id, robot_config) of each player, in the order they join
+        - rounds: the commands of each round, round_count: commands
+        - hashes: the game state hash at the end of each round, round_count: hash
+    """
+    seed: object
+    config: object
+    players: list = field(default_factory=list)
+    rounds: dict = field(default_factory=dict)
+    hashes: dict = field(default_factory=dict)
+
+
+def read_journal(path: str) -> Journal:
+    """
+    Read a journal file, ignoring an incomplete record at the end
+
+    :param path: the path of the journal file
+    :return: the content of the journal
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    journal = None
+    offset = 0
+    while offset + RECORD.size <= len(data):
+        record_type, length = RECORD.unpack_from(data, offset)
+        payload = data[offset + RECORD.size:offset + RECORD.size + length]
+        if len(payload) < length:
+            break  # the game stopped while writing the record
+        offset += RECORD.size + length
+
+        if record_type == RECORD_HEADER:
+            header = pickle.loads(payload)  # the version, seed and config of the game
+            if header[0] != JOURNAL_VERSION:
+                raise ValueError(f"Unsupported journal version {header[0]}")
+            journal = Journal(header[1], header[2])
+        elif record_type == RECORD_PLAYER:
+            journal.players.append(pickle.loads(payload))
+        elif record_type == RECORD_ROUND:
+            journal.rounds[struct.unpack_from('<I', payload)[0]] = decode_commands(payload[4:])
+        elif record_type == RECORD_HASH:
+            journal.hashes[struct.unpack_from('<I', payload)[0]] = payload[4:]
+
+    if journal is None:
+        raise ValueError("The journal has no header")
+    return journal
+
+
+def restore_command(command: tuple, game) -> Message:
+    """
+    Rebuild a decoded command for a game, items are copied from the robot's own items
+
+    :param command: the decoded command
+    :param game: the game to execute the command
+    :return: the command message
+    """
+    source, message_type, index, priority, kind, direction, item_range, path = command
+    data = None
+    if kind == DATA_DIRECTION:
+        data = direction
+    elif kind == DATA_ITEM:
+        robot = game.get_player(source)
+        if message_type == message.TYPE_SENSE:
+            items = robot.sensors
+        elif message_type == message.TYPE_FIRE:
+            items = robot.weapons
+        else:
+            items = robot.gadgets
+        data = copy.copy(items[index])
+        if hasattr(data, 'direction'):
+            data.direction = direction
+        if hasattr(data, 'range'):
+            data.range = item_range
+        if hasattr(data, 'commands'):
+            data.commands = path
+    return Message(source, message_type, index, data, priority)
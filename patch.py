@@ -0,0 +1,54 @@
+"""
+A rectangular window of the battlefield, returned by sensors and vision
+"""
+from dataclasses import dataclass
+
+
+@dataclass
+class Patch:
+    """
+    The values of the grids in a rectangular window of the battlefield
+
+        - x: the x-coordinate of the top-left grid
+        - y: the y-coordinate of the top-left grid
+        - width: the number of columns in the window
+        - height: the number of rows in the window
+        - payload: the values of the grids, row by row
+    """
+    x: int
+    y: int
+    width: int
+    height: int
+    payload: list
+
+    def get(self, x: int, y: int, default='*'):
+        """
+        Return the value of the grid at (x, y) on the battlefield
+        Return default if the grid is outside the window
+
+        :param x: the x-coordinate of the grid
+        :param y: the y-coordinate of the grid
+        :param default: the value of grids outside the window
+        :return: the value of the grid
+        """
+        if self.x <= x < self.x + self.width and self.y <= y < self.y + self.height:
+            return self.payload[(y - self.y) * self.width + (x - self.x)]
+        return default
+
+    def cells(self):
+        """
+        Iterate over the grids in the window
+
+        :return: an iterator of (x, y, value) of each grid
+        """
+        for i in range(0, self.height):
+            for j in range(0, self.width):
+                yield self.x + j, self.y + i, self.payload[i * self.width + j]
+
+    def display(self) -> list[list]:
+        """
+        Return the values of the window as a 2D list
+
+        :return: the values of the grids, row by row
+        """
+        return [self.payload[i * self.width:(i + 1) * self.width] for i in range(0, self.height)]
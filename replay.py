@@ -0,0 +1,65 @@
+"""
+Replay a game journal through the headless simulator
+
+Usage: python replay.py <journal file>
+
+The commands of each round are executed in the recorded order, and the
+game state hash after each round is checked against the journal
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(current_dir, 'Framework'))
+
+from dataclasses import dataclass
+
+from journal import read_journal, restore_command
+from simulator import Simulator
+
+
+@dataclass
+class ReplayResult:
+    """
+    The result of a replay
+
+        - rounds: the number of rounds replayed
+        - mismatch_round: the first round whose state hash differs from the journal, None if all match
+        - rounds_per_second: the speed of the replay
+    """
+    rounds: int
+    mismatch_round: int
+    rounds_per_second: float
+
+
+def replay(path: str, stop_at_mismatch: bool = True) -> ReplayResult:
+    """
+    Replay a journal and check the state hash of each round
+
+    :param path: the path of the journal file
+    :param stop_at_mismatch: whether to stop at the first round whose state differs
+    :return: the result of the replay
+    """
+    journal = read_journal(path)
+    simulator = Simulator([robot_config for _, robot_config in journal.players], journal.seed,
+                          player_ids=[player_id for player_id, _ in journal.players], config=journal.config)
+    game = simulator.game
+
+    mismatch_round = None
+    for round_count in sorted(journal.rounds):
+        simulator.step([restore_command(command, game) for command in journal.rounds[round_count]])
+        if round_count in journal.hashes and game.state_hash() != journal.hashes[round_count]:
+            if mismatch_round is None:
+                mismatch_round = round_count
+            if stop_at_mismatch:
+                break
+
+    return ReplayResult(simulator.rounds, mismatch_round, simulator.rounds_per_second())
+
+
+if __name__ == '__main__':
+    result = replay(sys.argv[1])
+    if result.mismatch_round is None:
+        print(f"Replayed {result.rounds} rounds, all states match ({result.rounds_per_second:.0f} rounds/s)")
+    else:
+        print(f"State differs from the journal at round {result.mismatch_round}")
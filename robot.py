@@ -1,13 +1,19 @@
 """
 The class for a player-controlled robot
 """
+import copy
+
 from Framework.interface import IDisplayable, IDamageable
 from damage import Damage
 from Configurations.robot_config import RobotConfig
+import grid as grid_kind
 from grid import Grid
-import Configurations.game_config as game_config
-import random
+from patch import Patch
+from Configurations.game_config import GameConfig, default_game_config
+from game_random import GameRandom
 from robot_state import RobotState
+from robot_map import RobotMap
+from robot_info import InfoEvent, InfoKind
 
 
 def print_list_helper(lst: list[list]) -> None:
@@ -41,16 +47,23 @@ def print_sensor_helper(reading: list[list]) -> None:
 
 class Robot(IDisplayable, IDamageable):
 
-    def __init__(self, robot_config: RobotConfig, player_id: int) -> None:
+    kind = grid_kind.ROBOT
+
+    def __init__(self, robot_config: RobotConfig, player_id: int, game_config: GameConfig = default_game_config) -> None:
         """
         initialize the robot and its sensors and weapons
 
         :param robot_config: config file for robot
         :param player_id: the id assigned by server
+        :param game_config: the configuration of the game the robot joins
         """
         # the id assigned to player and game
         self.player_id = player_id
+        self.robot_config = robot_config
         self.states = RobotState()
+        # the registry storing the status of the robot, None if the robot stores its own status
+        self.registry = None
+        self.slot = -1  # the index of the robot in the registry
 
         # extract base configuration
         self.max_HP = robot_config.HP
@@ -75,9 +88,87 @@ class Robot(IDisplayable, IDamageable):
         # the robot's information list
         self.info_list = []
         # the robot's local map
-        self.map = [["*" for _ in range(0, game_config.FIELD_COL)] for _ in range(0, game_config.FIELD_ROW)]
+        self.map = RobotMap(game_config.field_row, game_config.field_col)
         # the robot's current vision
         self.vision = []
+        # the random numbers of the robot, replaced by the game's when added to a game
+        self.rng = GameRandom()
+
+    @property
+    def HP(self) -> int:
+        """
+        :return: the current HP of the robot
+        """
+        if self.registry is None:
+            return self._HP
+        return self.registry.hp[self.slot]
+
+    @HP.setter
+    def HP(self, value: int) -> None:
+        if self.registry is None:
+            self._HP = value
+        else:
+            self.registry.hp[self.slot] = value
+
+    @property
+    def armor(self) -> int:
+        """
+        :return: the current armor of the robot
+        """
+        if self.registry is None:
+            return self._armor
+        return self.registry.armor[self.slot]
+
+    @armor.setter
+    def armor(self, value: int) -> None:
+        if self.registry is None:
+            self._armor = value
+        else:
+            self.registry.armor[self.slot] = value
+
+    def __getstate__(self) -> dict:
+        """
+        Pickle the robot without its random numbers and registry, which stay on server
+
+        :return: the attributes to pickle
+        """
+        state = self.__dict__.copy()
+        state['rng'] = None
+        if self.registry is not None:
+            state['registry'] = None
+            state['slot'] = -1
+            state['_HP'], state['_armor'] = self.HP, self.armor
+            state['states'] = RobotState()
+            state['states'].decode(self.states.encode())
+        return state
+
+    def clone(self, grid: Grid):
+        """
+        Return a copy of the robot at grid, used when the game is forked
+
+        The copy shares its configuration and items with the robot, items
+        are replaced rather than changed in place, so the copy has its own
+        lists of sensors, weapons and gadgets. The copy has its own status,
+        map and information, and is not in a registry
+
+        :param grid: the grid of the copy, None if the robot has no position
+        :return: the copy of the robot
+        """
+        robot = Robot.__new__(Robot)
+        robot.__dict__.update(self.__dict__)
+        robot.registry = None
+        robot.slot = -1
+        robot.HP, robot.armor = self.HP, self.armor
+        robot.states = RobotState()
+        robot.states.decode(self.states.encode())
+        robot.sensors = list(self.sensors)
+        robot.weapons = list(self.weapons)
+        robot.gadgets = list(self.gadgets)
+        robot.map = self.map.copy()
+        robot.info_list = list(self.info_list)
+        robot.vision = [row[:] for row in self.vision]
+        robot.grid = grid
+        return robot
 
     def display(self) -> str:
         """
@@ -122,7 +213,7 @@ class Robot(IDisplayable, IDamageable):
         :param state_type: the type of state to return
         :return: the state corresponding to state_type
         """
-        return self.states.state[state_type].state
+        return self.states.get(state_type)
 
     def get_state_time(self, state_type: str) -> int:
         """
@@ -134,7 +225,7 @@ class Robot(IDisplayable, IDamageable):
         :param state_type: the type of state to return
         :return: the remaining time of the state
         """
-        return self.states.state[state_type].recovery_time
+        return self.states.get_time(state_type)
 
     def set_pos(self, grid: Grid) -> None:
         """
@@ -144,6 +235,8 @@ class Robot(IDisplayable, IDamageable):
         :return: None
         """
         self.grid = grid
+        if self.registry is not None and grid is not None:
+            self.registry.x[self.slot], self.registry.y[self.slot] = grid.get_pos()
 
     def get_pos(self):
         """
@@ -157,12 +250,12 @@ class Robot(IDisplayable, IDamageable):
 
         return self.grid.get_pos()
 
-    def receive_info(self, info: str) -> None:
+    def receive_info(self, info: InfoEvent) -> None:
         """
-        Add one line of information for display
-        in the robot's info_list
+        Add one piece of information to the robot's info_list,
+        the text is only built when the information is printed
 
-        :param info: the line of information
+        :param info: the information
         :return: None
         """
         self.info_list.append(info)
@@ -170,19 +263,14 @@ class Robot(IDisplayable, IDamageable):
     def print_info(self) -> None:
         """
         Print all information gathered from self.info_list to console
-        If the information is a string, print it directly
-        If the information is a list, print it with print_list_helper
+        The text of the information is printed first, then its patch with print_list_helper
 
         :return: None
         """
         for info in self.info_list:
-            if isinstance(info, str):
-                print(info)
-            elif isinstance(info, list):
-                # print_sensor_helper(info)
-                print_list_helper(info)
-            else:
-                print('Unrecognized information type')
+            print(info.format())
+            if info.patch is not None:
+                print_list_helper(info.patch.display())
 
     def clear_info(self) -> None:
         """
@@ -192,20 +280,20 @@ class Robot(IDisplayable, IDamageable):
         """
         self.info_list.clear()
 
-    def update_map(self, robot_vision: list[list[str]]) -> None:
+    def update_map(self, robot_vision: Patch) -> None:
         """
         Update the player's local map
 
         :param robot_vision: the field of vision obtained by player
         :return: None
         """
-        for i in range(0, len(robot_vision)):
-            for j in range(0, len(robot_vision[0])):
-                if self.map[i][j] != robot_vision[i][j] and robot_vision[i][j] != '*':
-                    self.map[i][j] = robot_vision[i][j]
-                    # hide enemy robots
-                    if robot_vision[i][j] == 'R' and (j, i) != self.grid.get_pos():
-                        self.map[i][j] = '_'
+        for x, y, mark in robot_vision.cells():
+            if mark == '*':
+                continue
+            # hide enemy robots
+            if mark == 'R' and (x, y) != self.grid.get_pos():
+                mark = '_'
+            self.map.set(x, y, mark)
 
     def update_location_on_map(self, x: int, y: int, mark: str) -> None:
         """
@@ -216,9 +304,9 @@ class Robot(IDisplayable, IDamageable):
         :param mark: the mark to display on the map
         :return: None
         """
-        self.map[y][x] = mark
+        self.map.set(x, y, mark)
 
-    def update_vision(self, robot_vision: list[list[str]]) -> None:
+    def update_vision(self, robot_vision: Patch) -> None:
         """
         Update the player's vision
 
@@ -227,18 +315,12 @@ class Robot(IDisplayable, IDamageable):
         """
         # check robot state
         if not self.get_state("vision"):
-            self.receive_info("Robot vision is interrupted!")
+            self.receive_info(InfoEvent(InfoKind.VISION_INTERRUPTED))
             return
 
         x, y = self.grid.get_pos()
         for i in range(y - 1, y + 2):
-            row = []
-            for j in range(x - 1, x + 2):
-                if i < 0 or i >= len(robot_vision) or j < 0 or j >= len(robot_vision):
-                    row.append('*')
-                else:
-                    row.append(robot_vision[i][j])
-            self.vision.append(row)
+            self.vision.append([robot_vision.get(j, i) for j in range(x - 1, x + 2)])
 
     def print_vision(self) -> None:
         """
@@ -254,16 +336,21 @@ class Robot(IDisplayable, IDamageable):
 
         :return: None
         """
-        print_list_helper(self.map)
+        print_list_helper(self.map.display())
 
     def refill_gadgets(self) -> None:
         """
         Refill all gadgets
 
+        A used gadget is replaced by a refilled copy, since the gadget may be
+        shared with a copy of the robot in a forked game
+
         :return: None
         """
-        for gadget in self.gadgets:
-            gadget.reset_remaining_use()
+        for i, gadget in enumerate(self.gadgets):
+            if gadget.remain != gadget.total:
+                self.gadgets[i] = copy.copy(gadget)
+                self.gadgets[i].reset_remaining_use()
 
     def get_damage(self, damage: Damage):
         """
@@ -275,16 +362,16 @@ class Robot(IDisplayable, IDamageable):
         if self.armor >= damage.penetration:    # armor blocks part of damage
             self.HP -= int(damage.damage * (1 - self.armor_equip.armor_protection))
             # check if armor decreases
-            if random.random() <= self.armor_equip.armor_reduction_rate:
+            if self.rng.roll() <= self.armor_equip.armor_reduction_rate:
                 self.armor = max(0, self.armor - 1)
         else:   # armor is penetrated
             self.HP -= damage.damage
 
-        self.receive_info("Receives damage!")
+        self.receive_info(InfoEvent(InfoKind.DAMAGED))
 
         if self.HP <= 0:
             self.states.set_dead()  # change robot state to dead
-            self.receive_info("Robot destroyed!")
+            self.receive_info(InfoEvent(InfoKind.DESTROYED))
 
     def recovery_HP(self, HP: int) -> None:
         """
@@ -5,6 +5,7 @@ import Framework.message as message
 import barricade
 from Items import gadgets
 from Framework.event import Event
+from robot_info import InfoEvent, InfoKind, hit_info
 
 
 class RobotGadgets:
@@ -14,7 +15,7 @@ class RobotGadgets:
         self.battlefield = game.battlefield
         self.event_handler = game.event_handler
 
-    def deploy_gadget(self, x: int, y: int, gadget: gadgets.DeployableGadget) -> str:
+    def deploy_gadget(self, x: int, y: int, gadget: gadgets.DeployableGadget) -> InfoEvent:
         """
         Deploy a deployable gadget at a certain direction from (x, y)
 
@@ -35,7 +36,7 @@ class RobotGadgets:
 
         return gadget.config.execution_function(gadget, self.battlefield, px, py)
 
-    def throw_projectile_gadget(self, x: int, y: int, gadget: gadgets.ProjectileGadget) -> []:
+    def throw_projectile_gadget(self, x: int, y: int, gadget: gadgets.ProjectileGadget) -> list[InfoEvent]:
         """
         Throw an EMP bomb at a certain direction and range from (x, y)
 
@@ -61,18 +62,15 @@ class RobotGadgets:
         # find the targets in range
         targets = []
         from robot import Robot  # temporarily import robot
-        for i in range(max(0, px - gadget.config.impact_radius), min(len(self.battlefield.field[0]), px + gadget.config.impact_radius + 1)):
-            for j in range(max(0, py - gadget.config.impact_radius), min(len(self.battlefield.field), py + gadget.config.impact_radius + 1)):
-                if (i - px) ** 2 + (j - py) ** 2 <= gadget.config.impact_radius ** 2:
-                    occupant = self.battlefield.get_grid(i, j).get_occupant()
-                    if isinstance(occupant, Robot):
-                        targets.append(f"{gadget.config.name} hit " + occupant.get_name() + '!')
-                        # execute the effect of gadget
-                        gadget.execution_function(occupant)
+        for _, _, occupant in self.battlefield.get_damageables_in_range(px, py, gadget.config.impact_radius):
+            if isinstance(occupant, Robot):
+                targets.append(hit_info(occupant, gadget.config.name))
+                # execute the effect of gadget
+                gadget.execution_function(occupant)
 
         return targets
 
-    def use_repair_kit(self, robot, gadget: gadgets.RepairKit) -> str:
+    def use_repair_kit(self, robot, gadget: gadgets.RepairKit) -> InfoEvent:
         """
         Repair the robot
 
@@ -82,5 +80,5 @@ class RobotGadgets:
         """
         robot.recovery_HP(gadget.config.HP)
         robot.recovery_armor(gadget.config.armor)
-        return "Repair kit used!"
+        return InfoEvent(InfoKind.REPAIR_KIT_USED)
 
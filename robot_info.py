@@ -0,0 +1,229 @@
+"""
+The information a robot receives during a round
+
+Each piece of information is an InfoEvent: a kind code, a few integers and
+an optional patch. The text shown to a player is only built when the
+information is printed, and the events are sent to clients in a compact
+binary encoding
+"""
+import struct
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+import grid as grid_kind
+from patch import Patch
+
+
+class InfoKind(IntEnum):
+    """
+    The kinds of information
+    """
+    VISION_INTERRUPTED = 0
+    DAMAGED = 1
+    DESTROYED = 2
+    MOVE_INTERRUPTED = 3
+    MOVE_BLOCKED = 4
+    MOVED = 5  # x, y
+    SENSOR_INTERRUPTED = 6
+    WEAPON_INTERRUPTED = 7
+    GADGET_INTERRUPTED = 8
+    SOUND_SIGNAL = 9  # x, y, the sound signal as patch
+    HEAT_SIGNAL = 10  # x, y, the heat signal as patch
+    LIDAR_SCAN = 11  # x, y, the grids scanned as patch
+    DRONE_SCAN = 12  # x, y, the grids scanned as patch
+    SCOUT_CAR_SCAN = 13  # x, y, the grids scanned as patch
+    WEAPON_MISSED = 14
+    WEAPON_HIT = 15  # target kind, target player id
+    GADGET_HIT = 16  # target kind, target player id, the gadget name as label
+    REPAIR_KIT_USED = 17
+    DEPLOY_BLOCKED = 18
+    DEPLOYED = 19  # x, y
+
+
+# the text of each kind of information, formatted with the arguments, the target and the label
+INFO_FORMATS = {
+    InfoKind.VISION_INTERRUPTED: "Robot vision is interrupted!",
+    InfoKind.DAMAGED: "Receives damage!",
+    InfoKind.DESTROYED: "Robot destroyed!",
+    InfoKind.MOVE_INTERRUPTED: "The robot's movement is interrupted!",
+    InfoKind.MOVE_BLOCKED: "Movement failed, the location has been blocked",
+    InfoKind.MOVED: "Move to ({0}, {1})",
+    InfoKind.SENSOR_INTERRUPTED: "The robot's sensor is interrupted!",
+    InfoKind.WEAPON_INTERRUPTED: "The robot's weapon is interrupted!",
+    InfoKind.GADGET_INTERRUPTED: "The robot's gadget is interrupted!",
+    InfoKind.SOUND_SIGNAL: "Sound signal detected at ({0}, {1})\nSound signal: ",
+    InfoKind.HEAT_SIGNAL: "Heat signal detected at ({0}, {1})\nHeat signal: ",
+    InfoKind.LIDAR_SCAN: "Complete lidar scanning at ({0}, {1})",
+    InfoKind.DRONE_SCAN: "Drone scanning at ({0}, {1})",
+    InfoKind.SCOUT_CAR_SCAN: "Scout car scanning at ({0}, {1})",
+    InfoKind.WEAPON_MISSED: "weapon missed!",
+    InfoKind.WEAPON_HIT: "weapon hit {target}!",
+    InfoKind.GADGET_HIT: "{label} hit {target}!",
+    InfoKind.REPAIR_KIT_USED: "Repair kit used!",
+    InfoKind.DEPLOY_BLOCKED: "Deployment failed: the location has been blocked",
+    InfoKind.DEPLOYED: "Deploy barricade at ({0}, {1})",
+}
+
+# kind, number of arguments, length of label (255 if no label), type of patch
+INFO = struct.Struct('<BBBB')
+PATCH = struct.Struct('<iiHH')  # x, y, width, height
+COUNT = struct.Struct('<H')
+
+# the types of patch payload
+NO_PATCH = 0
+GLYPH_PATCH = 1  # the display of grids, one character each
+SIGNAL_PATCH = 2  # signal intensities, one integer each
+
+
+@dataclass
+class InfoEvent:
+    """
+    A piece of information received by a robot
+
+        - kind: the kind of information
+        - args: the integer arguments of the information, see InfoKind
+        - patch: the window of the battlefield attached to the information, None if no window
+        - label: the name of the item involved, None if no item
+    """
+    kind: InfoKind
+    args: tuple = field(default_factory=tuple)
+    patch: Patch = None
+    label: str = None
+
+    def __reduce__(self):
+        """
+        Pickle the information with its compact encoding
+        """
+        return decode_info, (self.encode(),)
+
+    def format(self) -> str:
+        """
+        Return the text of the information
+
+        :return: the text shown to the player
+        """
+        target = None
+        if self.kind in (InfoKind.WEAPON_HIT, InfoKind.GADGET_HIT):
+            target = target_name(self.args[0], self.args[1])
+        return INFO_FORMATS[self.kind].format(*self.args, target=target, label=self.label)
+
+    def encode(self) -> bytes:
+        """
+        Encode the information as bytes
+
+        :return: the encoded information
+        """
+        label = self.label.encode() if self.label is not None else b''
+        if self.patch is None:
+            patch_type = NO_PATCH
+        elif self.patch.payload and isinstance(self.patch.payload[0], str):
+            patch_type = GLYPH_PATCH
+        else:
+            patch_type = SIGNAL_PATCH
+
+        parts = [INFO.pack(self.kind, len(self.args), len(label) if self.label is not None else 255, patch_type),
+                 struct.pack(f'<{len(self.args)}i', *self.args), label]
+        if patch_type != NO_PATCH:
+            parts.append(PATCH.pack(self.patch.x, self.patch.y, self.patch.width, self.patch.height))
+            if patch_type == GLYPH_PATCH:
+                parts.append(''.join(self.patch.payload).encode('ascii'))
+            else:
+                parts.append(struct.pack(f'<{len(self.patch.payload)}b', *self.patch.payload))
+        return b''.join(parts)
+
+
+def target_name(kind: int, player_id: int) -> str:
+    """
+    Return the name of the target of a weapon or gadget
+
+    :param kind: the occupancy kind of the target, defined in grid
+    :param player_id: the id of the target if it is a robot
+    :return: the name of the target, as get_name() of the target
+    """
+    if kind == grid_kind.ROBOT:
+        return 'player ' + str(player_id)
+    elif kind == grid_kind.HARD_BARRICADE:
+        return 'hard barricade'
+    return 'barricade'
+
+
+def hit_info(occupant, gadget_name: str = None) -> InfoEvent:
+    """
+    Create the information of a weapon or gadget hitting an occupant
+
+    :param occupant: the occupant hit
+    :param gadget_name: the name of the gadget, None if hit by a weapon
+    :return: the information
+    """
+    player_id = occupant.get_id() if occupant.kind == grid_kind.ROBOT else -1
+    if gadget_name is None:
+        return InfoEvent(InfoKind.WEAPON_HIT, (occupant.kind, player_id))
+    return InfoEvent(InfoKind.GADGET_HIT, (occupant.kind, player_id), label=gadget_name)
+
+
+def read_info(data, offset: int) -> tuple:
+    """
+    Decode one piece of information from data
+
+    :param data: the encoded information
+    :param offset: the position of the information in data
+    :return: the information and the position after it
+    """
+    kind, num_args, label_length, patch_type = INFO.unpack_from(data, offset)
+    offset += INFO.size
+    args = struct.unpack_from(f'<{num_args}i', data, offset)
+    offset += 4 * num_args
+    label = None
+    if label_length != 255:
+        label = bytes(data[offset:offset + label_length]).decode()
+        offset += label_length
+
+    patch = None
+    if patch_type != NO_PATCH:
+        x, y, width, height = PATCH.unpack_from(data, offset)
+        offset += PATCH.size
+        size = width * height
+        if patch_type == GLYPH_PATCH:
+            payload = list(bytes(data[offset:offset + size]).decode('ascii'))
+        else:
+            payload = list(struct.unpack_from(f'<{size}b', data, offset))
+        offset += size
+        patch = Patch(x, y, width, height, payload)
+
+    return InfoEvent(InfoKind(kind), args, patch, label), offset
+
+
+def decode_info(data: bytes) -> InfoEvent:
+    """
+    Decode the result of InfoEvent.encode()
+
+    :param data: the encoded information
+    :return: the information
+    """
+    return read_info(data, 0)[0]
+
+
+def encode_infos(infos: list) -> bytes:
+    """
+    Encode the information of a round
+
+    :param infos: the InfoEvents
+    :return: the encoded information
+    """
+    return COUNT.pack(len(infos)) + b''.join(info.encode() for info in infos)
+
+
+def decode_infos(data: bytes) -> list:
+    """
+    Decode the result of encode_infos()
+
+    :param data: the encoded information
+    :return: the InfoEvents
+    """
+    data = memoryview(data)
+    infos = []
+    offset = COUNT.size
+    for _ in range(COUNT.unpack_from(data)[0]):
+        info, offset = read_info(data, offset)
+        infos.append(info)
+    return infos
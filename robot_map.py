@@ -0,0 +1,114 @@
+"""
+The local map of a robot, the part of the battlefield the robot has seen
+
+The map stores one byte per grid, the display character of the grid, and
+logs the grids that changed in the current round, so the grids a robot
+learned in a round are known without comparing maps
+"""
+
+
+class RobotMap:
+
+    UNKNOWN = '*'  # the display of a grid the robot has not seen
+
+    __slots__ = ('rows', 'columns', 'cells', 'log', 'shared')
+
+    def __init__(self, rows: int, columns: int) -> None:
+        """
+        Initialize a map where no grid has been seen
+
+        :param rows: the num of rows in the map
+        :param columns: the num of columns in the map
+        """
+        self.rows = rows
+        self.columns = columns
+        self.cells = bytearray(self.UNKNOWN.encode()) * (rows * columns)  # the display of each grid, indexed by y * columns + x
+        self.log = []  # the index of each grid changed in the round, in the order of change
+        self.shared = False  # whether cells is shared with a copy of the map
+
+    def get(self, x: int, y: int) -> str:
+        """
+        Return the display of the grid at (x, y)
+
+        :param x: the x-coordinate of the grid
+        :param y: the y-coordinate of the grid
+        :return: the display of the grid
+        """
+        return chr(self.cells[y * self.columns + x])
+
+    def set(self, x: int, y: int, mark: str) -> None:
+        """
+        Change the display of the grid at (x, y), the change is logged if the display differs
+
+        :param x: the x-coordinate of the grid
+        :param y: the y-coordinate of the grid
+        :param mark: the display of the grid
+        :return: None
+        """
+        index = y * self.columns + x
+        value = ord(mark)
+        if self.cells[index] != value:
+            if self.shared:
+                # copy the displays shared with a copy of the map before writing them
+                self.cells = bytearray(self.cells)
+                self.shared = False
+            self.cells[index] = value
+            self.log.append(index)
+
+    def changes(self) -> list[tuple]:
+        """
+        Return the grids changed in the round, each grid once
+
+        :return: the (x, y, mark) of each changed grid, mark is its current display
+        """
+        return [(index % self.columns, index // self.columns, chr(self.cells[index])) for index in dict.fromkeys(self.log)]
+
+    def clear_changes(self) -> None:
+        """
+        Start a new round of changes
+
+        :return: None
+        """
+        self.log.clear()
+
+    def copy(self):
+        """
+        Return a copy of the map and its changes, the displays are shared until either map changes them
+
+        :return: the copy of the map
+        """
+        robot_map = RobotMap.__new__(RobotMap)
+        robot_map.rows = self.rows
+        robot_map.columns = self.columns
+        robot_map.cells = self.cells
+        robot_map.log = list(self.log)
+        robot_map.shared = self.shared = True
+        return robot_map
+
+    def load(self, cells: bytes) -> None:
+        """
+        Replace the display of every grid, and clear the changes
+
+        Preconditions:
+            - len(cells) == self.rows * self.columns
+
+        :param cells: the display of each grid, indexed by y * columns + x
+        :return: None
+        """
+        self.cells = bytearray(cells)
+        self.shared = False
+        self.log.clear()
+
+    def tobytes(self) -> bytes:
+        """
+        :return: the display of each grid, indexed by y * columns + x
+        """
+        return bytes(self.cells)
+
+    def display(self) -> list[list[str]]:
+        """
+        Return the map as a 2D list
+
+        :return: the display of each grid, row by row
+        """
+        return [list(self.cells[i * self.columns:(i + 1) * self.columns].decode()) for i in range(0, self.rows)]
@@ -0,0 +1,202 @@
+"""
+An array-backed store of the status of robots, for games with many robots
+
+The registry keeps the HP, armor, position and states of every robot in
+columns with one entry per robot, instead of attributes on each robot. A
+robot in a registry reads and writes its status through the columns. The
+states of all robots are updated by the registry in one pass, which only
+visits the robots under effects. Area queries stay on the spatial index of
+the battlefield, which only visits the buckets in range
+"""
+from array import array
+
+from robot_state import STATE_TYPES, STATE_BITS
+
+
+class RegistryState:
+    """
+    The states of a robot stored in a registry, with the interface of RobotState
+    """
+
+    __slots__ = ('registry', 'slot')
+
+    def __init__(self, registry, slot: int) -> None:
+        """
+        :param registry: the registry storing the states
+        :param slot: the index of the robot in the registry
+        """
+        self.registry = registry
+        self.slot = slot
+
+    def get(self, state_type: str) -> bool:
+        """
+        Return the status of a state
+
+        :param state_type: the type of state
+        :return: the status of the state
+        """
+        return self.registry.flags[STATE_BITS[state_type]][self.slot] == 1
+
+    def get_time(self, state_type: str) -> int:
+        """
+        Return the recovery time of a state
+
+        :param state_type: the type of state
+        :return: the recovery time of the state
+        """
+        return self.registry.timers[STATE_BITS[state_type]][self.slot]
+
+    def set_normal(self) -> None:
+        """
+        set the robot to normal state
+
+        :return: None
+        """
+        for flags, timers in zip(self.registry.flags, self.registry.timers):
+            flags[self.slot] = 1
+            timers[self.slot] = 0
+
+    def set_dead(self) -> None:
+        """
+        set the robot to dead state
+
+        :return: None
+        """
+        for flags, timers in zip(self.registry.flags, self.registry.timers):
+            flags[self.slot] = 0
+            timers[self.slot] = -1
+
+    def set_state(self, state_type: str, state: bool, recovery_time: int) -> None:
+        """
+        Set the state of robot
+
+        :param state_type: the type of state to set
+        :param state: the state to set
+        :param recovery_time: the recovery time of the state
+        :return: None
+        """
+        self.apply_effect(1 << STATE_BITS[state_type], state, recovery_time)
+
+    def apply_effect(self, mask: int, state: bool, recovery_time: int) -> None:
+        """
+        Set several states of robot at once, each as set_state()
+
+        :param mask: the flags of the states to set, from state_mask()
+        :param state: the state to set
+        :param recovery_time: the recovery time of the states
+        :return: None
+        """
+        for i, (flags, timers) in enumerate(zip(self.registry.flags, self.registry.timers)):
+            if mask >> i & 1:
+                flags[self.slot] = 1 if state else 0
+                timers[self.slot] = max(recovery_time, timers[self.slot])
+        self.registry.active.add(self.slot)
+
+    def update_state(self) -> None:
+        """
+        Update robot state after each round
+
+        :return: None
+        """
+        for flags, timers in zip(self.registry.flags, self.registry.timers):
+            if timers[self.slot] > 0:
+                timers[self.slot] -= 1
+            elif timers[self.slot] == 0:
+                flags[self.slot] = 1
+
+    def encode(self) -> tuple:
+        """
+        Encode the robot states as a tuple of integers, in the format of RobotState.encode()
+
+        :return: the encoded states
+        """
+        encoded = []
+        for flags, timers in zip(self.registry.flags, self.registry.timers):
+            encoded.append(flags[self.slot])
+            encoded.append(timers[self.slot])
+        return tuple(encoded)
+
+    def decode(self, encoded: tuple) -> None:
+        """
+        Set the robot states from the result of encode()
+
+        :param encoded: the encoded states
+        :return: None
+        """
+        for i, (flags, timers) in enumerate(zip(self.registry.flags, self.registry.timers)):
+            flags[self.slot] = 1 if encoded[2 * i] == 1 else 0
+            timers[self.slot] = encoded[2 * i + 1]
+        self.registry.active.add(self.slot)
+
+
+class RobotRegistry:
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty registry
+        """
+        self.robots = []  # the robots in the registry, indexed by slot
+        self.hp = array('i')  # the HP of each robot
+        self.armor = array('i')  # the armor of each robot
+        self.x = array('i')  # the x-coordinate of each robot
+        self.y = array('i')  # the y-coordinate of each robot
+        # the status and recovery time of each state of each robot, indexed by StateType
+        self.flags = [array('b') for _ in STATE_TYPES]
+        self.timers = [array('i') for _ in STATE_TYPES]
+        self.active = set()  # the slots of robots whose states may change in the next tick
+
+    def register(self, robot) -> None:
+        """
+        Move the status of a robot into the registry
+
+        Preconditions:
+            - robot.registry is None
+
+        :param robot: the robot to register
+        :return: None
+        """
+        hp, armor, states = robot.HP, robot.armor, robot.states.encode()
+        pos = robot.get_pos() if robot.get_pos() is not None else (-1, -1)
+
+        robot.slot = len(self.robots)
+        self.robots.append(robot)
+        self.hp.append(0)
+        self.armor.append(0)
+        self.x.append(pos[0])
+        self.y.append(pos[1])
+        for flags, timers in zip(self.flags, self.timers):
+            flags.append(0)
+            timers.append(0)
+
+        robot.registry = self
+        robot.HP, robot.armor = hp, armor
+        robot.states = RegistryState(self, robot.slot)
+        robot.states.decode(states)
+
+    def tick(self) -> None:
+        """
+        Update the states of all robots after each round
+
+        A state with recovery time above 0 has its time reduced by one, a
+        state with recovery time 0 recovers, and a state with recovery time
+        -1 never recovers
+
+        Only robots whose states were set since they last settled are
+        visited, so the cost depends on the number of robots under effects
+        rather than the number of robots in the game
+
+        :return: None
+        """
+        columns = list(zip(self.flags, self.timers))
+        settled = []
+        for slot in self.active:
+            changing = False
+            for flags, timers in columns:
+                if timers[slot] > 0:
+                    timers[slot] -= 1
+                    changing = True
+                elif timers[slot] == 0:
+                    flags[slot] = 1
+            if not changing:
+                settled.append(slot)
+        self.active.difference_update(settled)
@@ -2,6 +2,8 @@
 Handle sensor detection
 """
 import Items.sensors as sensors
+import grid
+from patch import Patch
 from Framework import message
 
 
@@ -11,10 +13,9 @@ class RobotSensor:
         self.game = game
         self.battlefield = game.battlefield
 
-    def display_player_vision(self, x: int, y: int) -> list[list[str]]:
+    def display_player_vision(self, x: int, y: int) -> Patch:
         """
-        Display the 3 * 3 region of the grid in player's vision, the rest of
-        the grids are displayed as empty space
+        Display the 3 * 3 region of the grid in player's vision
 
         :param x: the x-ccordinate of player
         :param y: the y-coordinate of player
@@ -22,29 +23,30 @@ class RobotSensor:
         """
         return self.display_grid_helper(x, y, 1)
 
-    def display_grid_helper(self, x: int, y: int, radius: int) -> list[list[str]]:
+    def display_grid_helper(self, x: int, y: int, radius: int, kinds=None) -> Patch:
         """
         Helper method, display a square region centered at (x, y) with a given radius
-        Part of map outside the region is displayed as empty space
+        The region is clipped to the battlefield
 
         :param x: the x-coordinate of the center
         :param y: the y-coordinate of the center
         :param radius: the radius of the square region
+        :param kinds: the occupancy kinds to read, the current kinds of the battlefield if None
         :return: a string representation of the square region
         """
-        result = []
-        for i in range(0, len(self.battlefield.field)):
-            row = []
-            for j in range(0, len(self.battlefield.field[0])):
-                if y - radius <= i <= y + radius and x - radius <= j <= x + radius:
-                    row.append(self.battlefield.get_grid(j, i).display())
-                else:
-                    row.append('*')
-            result.append(row)
-
-        return result
-
-    def display_signal_vision(self, x: int, y: int, sensor) -> list[list]:
+        if kinds is None:
+            kinds = self.battlefield.kinds
+        columns = self.battlefield.columns
+        left, right = max(0, x - radius), min(columns, x + radius + 1)
+        top, bottom = max(0, y - radius), min(self.battlefield.rows, y + radius + 1)
+        payload = []
+        for i in range(top, bottom):
+            # read the occupancy kinds of the row inside the region
+            payload.extend([grid.GLYPHS[kind] for kind in kinds[i * columns + left:i * columns + right]])
+
+        return Patch(left, top, max(0, right - left), max(0, bottom - top), payload)
+
+    def display_signal_vision(self, x: int, y: int, sensor) -> Patch:
         """
         Show the sound/heat signal centered at (x, y) at a given radius
 
@@ -53,21 +55,26 @@ class RobotSensor:
         :param sensor: the sensor used to detect the signal
         :return: the signal to display
         """
-        result = [['*' for _ in range(0, len(self.battlefield.field[0]))] for _ in range(0, len(self.battlefield.field))]
-        for i in range(0, len(self.battlefield.field)):
-            for j in range(0, len(self.battlefield.field[0])):
-                if y - sensor.config.radius <= i <= y + sensor.config.radius and x - sensor.config.radius <= j <= x + sensor.config.radius:
-                    # TODO: refactor this part if more types of signals are added
-                    if isinstance(sensor, sensors.SoundSensor):
-                        result[i][j] = self.battlefield.get_grid(j, i).get_sound()
-                    elif isinstance(sensor, sensors.HeatSensor):
-                        result[i][j] = self.battlefield.get_grid(j, i).get_heat()
-                    else:
-                        print('Unrecognized signal type')
-
-        return result
-
-    def display_lidar_vision(self, x: int, y: int, lidar: sensors.Lidar) -> list[list[str]]:
+        radius = sensor.config.radius
+        left, right = max(0, x - radius), min(self.battlefield.columns, x + radius + 1)
+        top, bottom = max(0, y - radius), min(self.battlefield.rows, y + radius + 1)
+        # TODO: refactor this part if more types of signals are added
+        if isinstance(sensor, sensors.SoundSensor):
+            layer = self.battlefield.sound
+        elif isinstance(sensor, sensors.HeatSensor):
+            layer = self.battlefield.heat
+        else:
+            print('Unrecognized signal type')
+            return Patch(left, top, 0, 0, [])
+
+        layer.resolve()  # apply the signals emitted earlier in the round
+        payload = []
+        for i in range(top, bottom):
+            payload.extend(layer.current(i * self.battlefield.columns + left, i * self.battlefield.columns + right))
+
+        return Patch(left, top, max(0, right - left), max(0, bottom - top), payload)
+
+    def display_lidar_vision(self, x: int, y: int, lidar: sensors.Lidar) -> Patch:
         """
         Show the lidar detection centered at (x, y) at a given radius
         Emit sound and heat signal around the detection point
@@ -83,7 +90,7 @@ class RobotSensor:
 
         return self.display_grid_helper(x, y, lidar.config.radius)
 
-    def display_drone_vision(self, x: int, y: int, drone: sensors.Drone) -> [list[list[str]], tuple[int, int]]:
+    def display_drone_vision(self, x: int, y: int, drone: sensors.Drone) -> [Patch, tuple[int, int]]:
         """
         Show the drone scanning started from (x, y)
         Emit sound and heat signal around (x, y)
@@ -100,9 +107,9 @@ class RobotSensor:
                 drone_y -= 1
             elif direction == 'a' and drone_x > 0:
                 drone_x -= 1
-            elif direction == 's' and drone_y < len(self.battlefield.field) - 1:
+            elif direction == 's' and drone_y < self.battlefield.rows - 1:
                 drone_y += 1
-            elif direction == 'd' and drone_x < len(self.battlefield.field[0]) - 1:
+            elif direction == 'd' and drone_x < self.battlefield.columns - 1:
                 drone_x += 1
 
         self.battlefield.generate_sound(x, y, drone.config.sound_emission)
@@ -110,7 +117,7 @@ class RobotSensor:
 
         return self.display_grid_helper(drone_x, drone_y, drone.config.radius), (drone_x, drone_y)
 
-    def display_scout_car_vision(self, x: int, y: int, scout_car: sensors.ScoutCar) -> [list[list[str]], tuple[int, int]]:
+    def display_scout_car_vision(self, x: int, y: int, scout_car: sensors.ScoutCar) -> [Patch, tuple[int, int]]:
         """
         Show the scout car scanning started from (x, y)
         Emit sound and heat signal around (x, y)
@@ -128,21 +135,21 @@ class RobotSensor:
             vy = -1
         elif scout_car.direction == message.LEFT and car_x > 0:
             vx = -1
-        elif scout_car.direction == message.DOWN and car_y < len(self.battlefield.field) - 1:
+        elif scout_car.direction == message.DOWN and car_y < self.battlefield.rows - 1:
             vy = 1
-        elif scout_car.direction == message.RIGHT and car_x < len(self.battlefield.field[0]) - 1:
+        elif scout_car.direction == message.RIGHT and car_x < self.battlefield.columns - 1:
             vx = 1
 
         max_barricade_remove = scout_car.config.max_barricade_remove
         # move along the direction while breaking the barricades along the way
-        while self.battlefield.get_grid(car_x + vx, car_y + vy) is not None and not self.battlefield.is_blocked(car_x + vx, car_y + vy):
+        while not self.battlefield.is_blocked(car_x + vx, car_y + vy):
             # update car location
             car_x += vx
             car_y += vy
             # remove barricades
-            if self.battlefield.get_grid(car_x, car_y) is not None and self.battlefield.get_grid(car_x, car_y).display() == 'x':
+            if self.battlefield.get_kind(car_x, car_y) == grid.BARRICADE:
                 if max_barricade_remove > 0:
-                    self.battlefield.get_grid(car_x, car_y).remove_occupant()
+                    self.battlefield.remove_occupant(car_x, car_y)
                     max_barricade_remove -= 1
                 else:
                     break
@@ -1,37 +1,115 @@
-from dataclasses import dataclass
+from array import array
+from enum import IntEnum
 
 
-@dataclass
-class State:
+class StateType(IntEnum):
     """
-    the class for a single robot state
+    The types of robot state, the value is the bit of the state in the flags
+    """
+    VISION = 0  # whether the robot has vision
+    MOVE = 1  # whether the robot can move
+    SENSOR = 2  # whether the robot can use sensors
+    WEAPON = 3  # whether the robot can use weapons
+    GADGET = 4  # whether the robot can use gadgets
+    ALIVE = 5  # whether the robot is alive
 
-        - state: the status of the state
-        - recovery_time: the time before the state recovers to normal
 
-    Note: 0 recovery_time indicates normal state, -1 indicates the state never recovers
+# the names of the types of robot state, in the order they are encoded
+STATE_TYPES = tuple(state_type.name.lower() for state_type in StateType)
+# the bit of each state, by name or by StateType
+STATE_BITS = {**{name: i for i, name in enumerate(STATE_TYPES)}, **{state_type: int(state_type) for state_type in StateType}}
+ALL_STATES = (1 << len(STATE_TYPES)) - 1  # the flags of a robot in normal state
+
+
+def state_mask(*state_types) -> int:
     """
-    state: bool
-    recovery_time: int
+    Return the flags of a set of states
+
+    :param state_types: the names or StateTypes of the states
+    :return: the flags with the bit of each state set
+    """
+    mask = 0
+    for state_type in state_types:
+        mask |= 1 << STATE_BITS[state_type]
+    return mask
+
+
+def update_states(states) -> None:
+    """
+    Update the states of many robots after each round
+
+    Robots in normal state are skipped
+
+    :param states: the RobotState of each robot
+    :return: None
+    """
+    for robot_states in states:
+        if robot_states.flags != ALL_STATES or any(robot_states.timers):
+            robot_states.update_state()
 
 
 class RobotState:
+    """
+    the class for robot states
+
+    The status of the states are stored as bits of an integer, and the
+    recovery times in an array, both indexed by StateType:
+
+        - vision: whether the robot has vision
+        - move: whether the robot can move
+        - sensor: whether the robot can use sensors
+        - weapon: whether the robot can use weapons
+        - gadget: whether the robot can use gadgets
+        - alive: whether the robot is alive
+
+    Note: 0 recovery_time indicates normal state, -1 indicates the state never recovers
+    """
+
+    __slots__ = ('flags', 'timers')
 
     def __init__(self):
         """
-        the class for robot states
+        Initialize the robot in normal state
+        """
+        self.flags = ALL_STATES  # the status of the states, one bit for each state
+        self.timers = array('i', bytes(4 * len(STATE_TYPES)))  # the recovery time of each state
+
+    def __getstate__(self) -> tuple:
+        """
+        Pickle the states as the flags and the raw recovery times
 
-        The robot stores its state in a dictionary, with the following keys:
+        :return: the states to pickle
+        """
+        return self.flags, self.timers.tobytes()
 
-            - vision: whether the robot has vision
-            - move: whether the robot can move
-            - sensor: whether the robot can use sensors
-            - weapon: whether the robot can use weapons
-            - gadget: whether the robot can use gadgets
-            - alive: whether the robot is alive
+    def __setstate__(self, state: tuple) -> None:
         """
-        self.state = {"vision": State(True, 0), "move": State(True, 0), "sensor": State(True, 0),
-                      "weapon": State(True, 0), "gadget": State(True, 0), "alive": State(True, 0)}
+        Restore the states from __getstate__()
+
+        :param state: the pickled states
+        :return: None
+        """
+        self.flags = state[0]
+        self.timers = array('i')
+        self.timers.frombytes(state[1])
+
+    def get(self, state_type) -> bool:
+        """
+        Return the status of a state
+
+        :param state_type: the name or StateType of the state
+        :return: the status of the state
+        """
+        return self.flags >> STATE_BITS[state_type] & 1 == 1
+
+    def get_time(self, state_type) -> int:
+        """
+        Return the recovery time of a state
+
+        :param state_type: the name or StateType of the state
+        :return: the recovery time of the state
+        """
+        return self.timers[STATE_BITS[state_type]]
 
     def set_normal(self):
         """
@@ -39,8 +117,8 @@ class RobotState:
 
         :return: None
         """
-        for key in self.state:
-            self.state[key] = State(True, 0)
+        self.flags = ALL_STATES
+        self.timers = array('i', bytes(4 * len(STATE_TYPES)))
 
     def set_dead(self):
         """
@@ -48,30 +126,75 @@ class RobotState:
 
         :return: None
         """
-        for key in self.state:
-            self.state[key] = State(False, -1)
+        self.flags = 0
+        self.timers = array('i', [-1]) * len(STATE_TYPES)
 
-    def set_state(self, state_type: str, state: bool, recovery_time: int) -> None:
+    def set_state(self, state_type, state: bool, recovery_time: int) -> None:
         """
         Set the state of robot
 
         Preconditions:
-            - state_type in self.states ("vision", "move", "sensor", "weapon", "gadget", "alive")
+            - state_type in ("vision", "move", "sensor", "weapon", "gadget", "alive") or a StateType
 
-        :param state_type: the type of state to set
+        :param state_type: the name or StateType of the state to set
         :param state: the state to set
         :param recovery_time: the recovery time of the state
         :return: None
         """
-        current_recovery_time = self.state[state_type].recovery_time
-        self.state[state_type] = State(state, max(recovery_time, current_recovery_time))
+        self.apply_effect(1 << STATE_BITS[state_type], state, recovery_time)
+
+    def apply_effect(self, mask: int, state: bool, recovery_time: int) -> None:
+        """
+        Set several states of robot at once, each as set_state()
+
+        :param mask: the flags of the states to set, from state_mask()
+        :param state: the state to set
+        :param recovery_time: the recovery time of the states
+        :return: None
+        """
+        if state:
+            self.flags |= mask
+        else:
+            self.flags &= ~mask
+        timers = self.timers
+        for i in range(len(STATE_TYPES)):
+            if mask >> i & 1 and recovery_time > timers[i]:
+                timers[i] = recovery_time
 
     def update_state(self):
         """
         Update robot state after each round
         """
-        for key in self.state:
-            if self.state[key].recovery_time > 0:
-                self.state[key].recovery_time -= 1
-            elif self.state[key].recovery_time == 0:
-                self.state[key].state = True
+        timers = self.timers
+        for i in range(len(STATE_TYPES)):
+            if timers[i] > 0:
+                timers[i] -= 1
+            elif timers[i] == 0:
+                self.flags |= 1 << i
+
+    def encode(self) -> tuple:
+        """
+        Encode the robot states as a tuple of integers
+
+        Each state is encoded as its status (1 or 0) followed by its recovery time
+
+        :return: the encoded states
+        """
+        encoded = []
+        for i in range(len(STATE_TYPES)):
+            encoded.append(self.flags >> i & 1)
+            encoded.append(self.timers[i])
+        return tuple(encoded)
+
+    def decode(self, encoded: tuple) -> None:
+        """
+        Set the robot states from the result of encode()
+
+        :param encoded: the encoded states
+        :return: None
+        """
+        self.flags = 0
+        for i in range(len(STATE_TYPES)):
+            if encoded[2 * i] == 1:
+                self.flags |= 1 << i
+        self.timers = array('i', encoded[1::2])
@@ -4,8 +4,27 @@ Handle weapon detection
 from Framework.interface import IDamageable
 from Items import weapons
 import Framework.message as message
-import random
 from dataclasses import replace
+from functools import lru_cache
+from robot_info import InfoEvent, InfoKind, hit_info
+
+
+@lru_cache(maxsize=None)
+def accuracy_table(accuracy: float, accuracy_decay: float, weapon_range: int) -> tuple:
+    """
+    Return the accuracy of a straight-firing weapon at each distance
+
+    The accuracy reduces by accuracy_decay for each grid after the first one
+
+    :param accuracy: the accuracy at distance 1
+    :param accuracy_decay: the decay of accuracy through distance
+    :param weapon_range: the range of the weapon
+    :return: the accuracy indexed by distance
+    """
+    table = [accuracy, accuracy]
+    for _ in range(2, weapon_range + 1):
+        table.append(table[-1] - accuracy_decay)
+    return tuple(table)
 
 
 class RobotWeapons:
@@ -14,7 +33,7 @@ class RobotWeapons:
         self.game = game
         self.battlefield = game.battlefield
 
-    def shoot_straight_weapon(self, x: int, y: int, weapon: weapons.StraightWeapon) -> str:
+    def shoot_straight_weapon(self, x: int, y: int, weapon: weapons.StraightWeapon) -> InfoEvent:
         """
         Fire the weapon from (x, y) at a given direction. The weapon deals
         certain damage to the target hit
@@ -22,7 +41,7 @@ class RobotWeapons:
         :param x: the x-coordinate of starting point
         :param y: the y-coordinate of the starting point
         :param weapon: the weapon used
-        :return: the target hit by the weapon
+        :return: the information on the target hit
         """
         # generate sound and heat at starting position
         self.battlefield.generate_sound(x, y, weapon.config.sound_emission)
@@ -30,7 +49,6 @@ class RobotWeapons:
 
         # set shooting direction
         dx, dy = 0, 0
-        px, py = x, y
         if weapon.direction == message.UP:
             dy = -1
         elif weapon.direction == message.DOWN:
@@ -40,41 +58,27 @@ class RobotWeapons:
         elif weapon.direction == message.RIGHT:
             dx = 1
 
-        distance = 1
-        # initial displacement
-        px += dx
-        py += dy
-        damage = weapon.config.damage
-        accuracy = weapon.config.accuracy
+        # shooting without a direction hits nothing
+        if dx == 0 and dy == 0:
+            return InfoEvent(InfoKind.WEAPON_MISSED)
+
         # find the first target hit
-        while not self.battlefield.is_occupied(px, py):
-            px += dx
-            py += dy
-            accuracy -= weapon.config.accuracy_decay    # reduce weapon accuracy through distance
-            distance += 1
-            if distance >= weapon.config.range:
-                break
-
-        # prevent out-of-bound index
-        px = max(0, min(px, len(self.battlefield.field[0]) - 1))
-        py = max(0, min(py, len(self.battlefield.field) - 1))
-
-        # prevent hitting player itself
-        if px == x and py == y:
-            return 'weapon missed!'
+        distance = self.battlefield.first_occupied(x, y, dx, dy, weapon.config.range)
+        if distance is None:
+            return InfoEvent(InfoKind.WEAPON_MISSED)
 
         # deals damage to the target
-        occupant = self.battlefield.get_grid(px, py).get_occupant()
+        occupant = self.battlefield.get_occupant(x + dx * distance, y + dy * distance)
         if isinstance(occupant, IDamageable):
-            print(self.battlefield.get_grid(px, py).get_occupant())
-            # check whether the target is hit
-            if random.random() <= accuracy:
-                occupant.get_damage(damage)
-                return 'weapon hit ' + occupant.get_name() + '!'
+            # check whether the target is hit, accuracy reduces through distance
+            accuracy = accuracy_table(weapon.config.accuracy, weapon.config.accuracy_decay, weapon.config.range)[distance]
+            if self.game.rng.roll() <= accuracy:
+                occupant.get_damage(weapon.config.damage)
+                return hit_info(occupant)
 
-        return 'weapon missed!'
+        return InfoEvent(InfoKind.WEAPON_MISSED)
 
-    def shoot_projectile_weapon(self, x: int, y: int, weapon: weapons.ProjectileWeapon) -> list[str]:
+    def shoot_projectile_weapon(self, x: int, y: int, weapon: weapons.ProjectileWeapon) -> list[InfoEvent]:
         """
         Fire a projectile weapon from (x, y) at a given direction and range. The weapon deals
         certain damage to the target hit
@@ -82,7 +86,7 @@ class RobotWeapons:
         :param x: the x-coordinate of starting point
         :param y: the y-coordinate of the starting point
         :param weapon: the weapon used
-        :return: the targets hit by the weapon
+        :return: the information on each target hit
         """
         targets = []
 
@@ -101,16 +105,11 @@ class RobotWeapons:
         elif weapon.direction == message.RIGHT:
             px += weapon.range
 
-        # examine the grids in the range
-        for i in range(max(0, px - weapon.config.impact_radius), min(len(self.battlefield.field[0]), px + weapon.config.impact_radius + 1)):
-            for j in range(max(0, py - weapon.config.impact_radius), min(len(self.battlefield.field), py + weapon.config.impact_radius + 1)):
-                if (i - px) ** 2 + (j - py) ** 2 <= weapon.config.impact_radius ** 2:
-                    # deals damage to the target
-                    occupant = self.battlefield.get_grid(i, j).get_occupant()
-                    if isinstance(occupant, IDamageable):
-                        # calculate damage decay
-                        net_damage = weapon.config.damage.damage - weapon.config.impact_damage_decay * int(((i - px) ** 2 + (j - py) ** 2) ** 0.5)
-                        occupant.get_damage(replace(weapon.config.damage, damage=net_damage))
-                        targets.append("weapon hit " + occupant.get_name() + '!')
+        # examine the damageable occupants in the range
+        for i, j, occupant in self.battlefield.get_damageables_in_range(px, py, weapon.config.impact_radius):
+            # calculate damage decay
+            net_damage = weapon.config.damage.damage - weapon.config.impact_damage_decay * int(((i - px) ** 2 + (j - py) ** 2) ** 0.5)
+            occupant.get_damage(replace(weapon.config.damage, damage=net_damage))
+            targets.append(hit_info(occupant))
 
         return targets
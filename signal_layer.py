@@ -0,0 +1,244 @@
+"""
+A dense layer of signal intensity (heat or sound) covering the battlefield
+
+Intensities are stored in a flat array with one byte per grid, indexed
+by y * columns + x, instead of an attribute on every Grid object
+
+Emitted signals are buffered and resolved together in a single pass the
+next time the layer is read or changed. Since signals only add to the
+intensity before it is capped, resolving them together gives the same
+intensities as applying them one at a time
+
+Decay is applied lazily. The layer keeps the total reduction since it was
+created, and each grid keeps its last written intensity together with the
+total reduction at the time of writing. The current intensity is worked
+out when the grid is read, so reducing the whole layer costs O(1)
+
+A forked layer shares its intensities with the layer it was forked from,
+and either layer copies them the first time it writes a grid
+"""
+from array import array
+from functools import lru_cache
+import math
+
+
+@lru_cache(maxsize=None)
+def falloff_stencil(intensity: int) -> tuple:
+    """
+    Return the intensity a signal adds to the grids around its source
+
+    The signal falls by one for each unit of distance, so only the grids
+    within intensity - 1 of the source receive the signal. Stencils are
+    cached since signals share a few intensities
+
+    Preconditions:
+        - intensity > 0
+
+    :param intensity: the intensity of the signal
+    :return: the rows of the stencil, centered at the source
+    """
+    radius = intensity - 1
+    return tuple(array('b', [max(intensity - int(math.sqrt(dx ** 2 + dy ** 2)), 0) for dx in range(-radius, radius + 1)])
+                 for dy in range(-radius, radius + 1))
+
+
+def add_span(spans: dict, y: int, left: int, signals) -> None:
+    """
+    Helper function, add the signals starting at column left to the sums of row y
+
+    :param spans: the summed signals of each row, y: [left, sums]
+    :param y: the row of the signals
+    :param left: the column of the first signal
+    :param signals: the signals to add
+    :return: None
+    """
+    if y not in spans:
+        spans[y] = [left, list(signals)]
+        return
+
+    span_left, sums = spans[y]
+    right = left + len(signals)
+    span_right = span_left + len(sums)
+    # extend the summed span to cover the signals
+    if left < span_left or right > span_right:
+        sums = [0] * max(0, span_left - left) + sums + [0] * max(0, right - span_right)
+        span_left = min(span_left, left)
+        spans[y] = [span_left, sums]
+
+    offset = left - span_left
+    sums[offset:offset + len(signals)] = [total + signal for total, signal in zip(sums[offset:offset + len(signals)], signals)]
+
+
+class SignalLayer:
+
+    MAX_INTENSITY = 9   # the highest intensity a grid can hold
+
+    def __init__(self, rows: int, columns: int) -> None:
+        """
+        Initialize a layer with zero intensity everywhere
+
+        :param rows: the num of rows in the battlefield
+        :param columns: the num of columns in the battlefield
+        """
+        self.rows = rows
+        self.columns = columns
+        self.values = array('b', bytes(rows * columns))  # the last written intensity of each grid
+        self.stamps = array('q', bytes(8 * rows * columns))  # the total reduction when each grid was written
+        self.reduction = 0  # the total reduction applied to the layer
+        self.pending = []  # the signals emitted but not resolved, (x, y, intensity)
+        self.shared = False  # whether values and stamps are shared with a forked layer
+
+    def get(self, x: int, y: int) -> int:
+        """
+        Return the intensity at (x, y)
+
+        Preconditions:
+            - 0 <= x < self.columns
+            - 0 <= y < self.rows
+
+        :param x: the x-coordinate of grid
+        :param y: the y-coordinate of grid
+        :return: the intensity at the grid
+        """
+        if self.pending:
+            self.resolve()
+        index = y * self.columns + x
+        return max(self.values[index] - (self.reduction - self.stamps[index]), 0)
+
+    def change(self, x: int, y: int, value: int) -> None:
+        """
+        Change the intensity at (x, y), the final intensity is between 0 and 9
+
+        :param x: the x-coordinate of grid
+        :param y: the y-coordinate of grid
+        :param value: the change in intensity
+        :return: None
+        """
+        if self.pending:
+            self.resolve()
+        if self.shared:
+            self.unshare()
+        index = y * self.columns + x
+        current = max(self.values[index] - (self.reduction - self.stamps[index]), 0)
+        self.values[index] = max(min(current + value, self.MAX_INTENSITY), 0)
+        self.stamps[index] = self.reduction
+
+    def emit(self, x: int, y: int, intensity: int) -> None:
+        """
+        Emit a signal from (x, y), the intensity falls by one for each unit of distance
+
+        The signal is buffered until the layer is resolved
+
+        :param x: the x-coordinate of the source
+        :param y: the y-coordinate of the source
+        :param intensity: the intensity of the signal
+        :return: None
+        """
+        if intensity > 0:
+            self.pending.append((x, y, intensity))
+
+    def resolve(self) -> None:
+        """
+        Apply all buffered signals to the layer in one pass
+
+        The signals are summed row by row within their bounding boxes, then
+        each affected grid is written and capped once
+
+        :return: None
+        """
+        if not self.pending:
+            return
+
+        spans = {}  # the summed signals of each row, y: [left, sums]
+        for x, y, intensity in self.pending:
+            stencil = falloff_stencil(intensity)
+            radius = intensity - 1
+            # only the bounding box of the signal is affected
+            left, right = max(0, x - radius), min(self.columns, x + radius + 1)
+            for py in range(max(0, y - radius), min(self.rows, y + radius + 1)):
+                add_span(spans, py, left, stencil[py - y + radius][left - x + radius:right - x + radius])
+        self.pending = []
+        if self.shared:
+            self.unshare()
+
+        for py, (left, sums) in spans.items():
+            start, end = py * self.columns + left, py * self.columns + left + len(sums)
+            self.values[start:end] = array('b', [min(value + signal, self.MAX_INTENSITY)
+                                                 for value, signal in zip(self.current(start, end), sums)])
+            self.stamps[start:end] = array('q', [self.reduction]) * (end - start)
+
+    def current(self, start: int, end: int) -> list[int]:
+        """
+        Return the current intensities of the grids from index start to end
+
+        :param start: the index of the first grid
+        :param end: the index after the last grid
+        :return: the current intensities
+        """
+        return [max(value - (self.reduction - stamp), 0)
+                for value, stamp in zip(self.values[start:end], self.stamps[start:end])]
+
+    def reduce(self, reduction: int) -> None:
+        """
+        Reduce the intensity of every grid in the layer
+
+        Signals emitted before the reduction are resolved first
+
+        Preconditions:
+            - reduction >= 0
+
+        :param reduction: the amount of intensity reduced
+        :return: None
+        """
+        if self.pending:
+            self.resolve()
+        self.reduction += reduction
+
+    def load(self, values: bytes) -> None:
+        """
+        Replace the intensities of the layer, discarding buffered signals
+
+        :param values: the intensity of each grid, indexed by y * columns + x
+        :return: None
+        """
+        self.values = array('b', values)
+        self.stamps = array('q', bytes(8 * self.rows * self.columns))
+        self.reduction = 0
+        self.pending = []
+        self.shared = False
+
+    def fork(self):
+        """
+        Return a copy of the layer sharing the intensities until either layer writes a grid
+
+        :return: the forked layer
+        """
+        layer = SignalLayer.__new__(SignalLayer)
+        layer.rows = self.rows
+        layer.columns = self.columns
+        layer.values = self.values
+        layer.stamps = self.stamps
+        layer.reduction = self.reduction
+        layer.pending = list(self.pending)
+        layer.shared = self.shared = True
+        return layer
+
+    def unshare(self) -> None:
+        """
+        Copy the intensities shared with a forked layer before writing them
+
+        :return: None
+        """
+        self.values = array('b', self.values)
+        self.stamps = array('q', self.stamps)
+        self.shared = False
+
+    def display(self) -> list[list[int]]:
+        """
+        Return the intensities as a 2D list
+
+        :return: the intensity of each grid, row by row
+        """
+        if self.pending:
+            self.resolve()
+        return [self.current(i * self.columns, (i + 1) * self.columns) for i in range(0, self.rows)]
@@ -0,0 +1,113 @@
+"""
+A headless simulation of a game
+
+The simulator drives a Game directly with the commands of each round,
+without sockets, client prompts or console output, and measures the
+speed of the simulation
+"""
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(current_dir, 'Framework'))
+
+import copy
+import time
+
+from game import Game
+from robot import Robot
+from Configurations.robot_config import RobotConfig
+from Configurations.game_config import GameConfig, default_game_config
+from Framework import message
+from Framework.message import Message
+
+
+class Simulator:
+    """
+    Run a game by feeding the commands of each round to its MessageCenter
+    """
+
+    def __init__(self, robot_configs: list[RobotConfig], seed=None, game_id: int = 0, player_ids: list[int] = None,
+                 use_registry: bool = False, config: GameConfig = default_game_config) -> None:
+        """
+        Initialize a game with one player for each robot configuration
+
+        The players join in the order of robot_configs
+
+        :param robot_configs: the configuration of each player's robot
+        :param seed: the seed of the random numbers in the game
+        :param game_id: the id of the game
+        :param player_ids: the id of each player, from 1 to len(robot_configs) by default
+        :param use_registry: whether to store the status of robots in a RobotRegistry
+        :param config: the configuration of the game
+        """
+        if player_ids is None:
+            player_ids = list(range(1, len(robot_configs) + 1))
+
+        self.game = Game(game_id, len(robot_configs), seed, verbose=False, use_registry=use_registry, config=config)
+        for player_id, robot_config in zip(player_ids, robot_configs):
+            # each robot owns its items, the configurations share the item objects
+            self.game.add_player(Robot(copy.deepcopy(robot_config), player_id, config), player_id)
+
+        self.left = set()  # the ids of players who disconnected
+
+        self.rounds = 0  # the number of rounds simulated
+        self.elapsed = 0.0  # the time spent in simulation, in seconds
+
+    def living_players(self) -> list[Robot]:
+        """
+        Return the players who are alive and in the game
+
+        :return: the living players
+        """
+        return [player for player_id, player in self.game.players.items() if player.get_state("alive") and player_id not in self.left]
+
+    def step(self, messages: list[Message]) -> None:
+        """
+        Execute one round with the commands of the players
+
+        The round is resolved as by the server: execute the commands, update
+        the map of each connected player, then update the game. Players who
+        send a disconnect message leave after the round
+
+        :param messages: the command of each player in the round
+        :return: None
+        """
+        start = time.perf_counter()
+        for player_message in messages:
+            self.game.message_center.add_message(player_message)
+        self.game.message_center.execute_commands()
+
+        self.game.update_player_maps([player_id for player_id in self.game.players if player_id not in self.left])
+        self.game.update_game()
+
+        for player_message in messages:
+            if player_message.type == message.TYPE_DISCONNECT:
+                self.left.add(player_message.source)
+
+        self.elapsed += time.perf_counter() - start
+        self.rounds += 1
+
+    def run(self, policy, max_rounds: int) -> int:
+        """
+        Simulate rounds until at most one player is alive or max_rounds is reached
+
+        :param policy: a function that takes the simulator and returns the commands of the round
+        :param max_rounds: the maximum number of rounds to simulate
+        :return: the number of rounds simulated
+        """
+        rounds = 0
+        while rounds < max_rounds and len(self.living_players()) > 1:
+            self.step(policy(self))
+            rounds += 1
+        return rounds
+
+    def rounds_per_second(self) -> float:
+        """
+        Return the simulation speed, 0 if no round is simulated
+
+        :return: the number of rounds simulated per second
+        """
+        if self.elapsed == 0:
+            return 0.0
+        return self.rounds / self.elapsed
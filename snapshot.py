@@ -0,0 +1,217 @@
+"""
+A compact binary snapshot of a game
+
+A snapshot captures the state of a game between rounds: the random numbers,
+the sound and heat layers, the barricades, the robots and the scheduled
+events. Live objects are not pickled. Occupants are rebuilt on the
+battlefield, robots are updated in place, and events are rebuilt from their
+registered names, so a snapshot is restored into a game created with the
+same players
+
+The snapshot starts with a header, followed by the sections in the order
+they are written by write_snapshot()
+"""
+import copy
+import struct
+
+import grid as grid_kind
+from grid import Grid
+from barricade import Barricade, HardBarricade
+from Framework.event import make_event
+
+SNAPSHOT_MAGIC = b'IWSS'
+SNAPSHOT_VERSION = 2  # increase when the format of snapshots changes
+
+# magic, version, rows, columns, round count, number of players in game, whether the game started
+HEADER = struct.Struct('<4sHIIIi?')
+COUNT = struct.Struct('<I')
+RANDOM_STATE = struct.Struct('<625I?d')  # the Mersenne Twister state and the cached gauss number
+OCCUPANT = struct.Struct('<iibii')  # x, y, kind, HP, armor
+# player id, whether the robot has a position, whether the robot is on the field, x, y, HP, armor
+PLAYER = struct.Struct('<i??iiii')
+STATE = struct.Struct('<?i')  # status, recovery time
+# start round, end round, whether the event has a target, target, length of name, number of arguments
+EVENT = struct.Struct('<ii?iHB')
+
+
+class SnapshotReader:
+    """
+    Read the values of a snapshot in order
+    """
+
+    def __init__(self, data: bytes) -> None:
+        """
+        :param data: the snapshot
+        """
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, layout: struct.Struct) -> tuple:
+        """
+        :param layout: the layout of the values
+        :return: the next values in the snapshot
+        """
+        values = layout.unpack_from(self.data, self.offset)
+        self.offset += layout.size
+        return values
+
+    def unpack_array(self, type_code: str, length: int) -> tuple:
+        """
+        :param type_code: the struct type code of each value
+        :param length: the number of values
+        :return: the next length values in the snapshot
+        """
+        return self.unpack(struct.Struct(f'<{length}{type_code}'))
+
+    def read(self, length: int) -> bytes:
+        """
+        :param length: the number of bytes
+        :return: the next length bytes in the snapshot
+        """
+        data = self.data[self.offset:self.offset + length].tobytes()
+        if len(data) < length:
+            raise ValueError("The snapshot is truncated")
+        self.offset += length
+        return data
+
+
+def write_snapshot(game) -> bytes:
+    """
+    Encode the state of a game between rounds
+
+    :param game: the game to encode
+    :return: the snapshot
+    :raise ValueError: if an event in the game has no registered name
+    """
+    field = game.battlefield
+    size = field.rows * field.columns
+    parts = [HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, field.rows, field.columns,
+                         game.round_count, game.num_players, game.game_start)]
+
+    # random numbers
+    (_, internal_state, gauss_next), rolls = game.rng.getstate()
+    parts.append(RANDOM_STATE.pack(*internal_state, gauss_next is not None, gauss_next or 0.0))
+    parts.append(COUNT.pack(len(rolls)) + struct.pack(f'<{len(rolls)}d', *rolls))
+
+    # sound and heat, the decay is applied before saving
+    field.resolve_signals()
+    parts.append(bytes(field.sound.current(0, size)))
+    parts.append(bytes(field.heat.current(0, size)))
+
+    # barricades, robots are placed from their own positions
+    barricades = [(pos, occupant) for pos, occupant in field.occupant_items() if isinstance(occupant, (Barricade, HardBarricade))]
+    parts.append(COUNT.pack(len(barricades)))
+    for (x, y), occupant in barricades:
+        if isinstance(occupant, HardBarricade):
+            parts.append(OCCUPANT.pack(x, y, grid_kind.HARD_BARRICADE, occupant.HP, occupant.armor))
+        else:
+            parts.append(OCCUPANT.pack(x, y, grid_kind.BARRICADE, 0, 0))
+
+    # robots
+    parts.append(COUNT.pack(len(game.players)))
+    for player_id in sorted(game.players):
+        player = game.players[player_id]
+        pos = player.get_pos()
+        on_field = pos is not None and field.get_occupant(pos[0], pos[1]) is player
+        x, y = pos if pos is not None else (0, 0)
+        parts.append(PLAYER.pack(player_id, pos is not None, on_field, x, y, player.HP, player.armor))
+        states = player.states.encode()
+        parts.append(COUNT.pack(len(states) // 2))
+        parts.extend(STATE.pack(states[i] == 1, states[i + 1]) for i in range(0, len(states), 2))
+        parts.append(COUNT.pack(len(player.gadgets)) + struct.pack(f'<{len(player.gadgets)}i', *[gadget.remain for gadget in player.gadgets]))
+        parts.append(player.map.tobytes())
+
+    # events, in the order they are executed
+    events = game.event_handler.scheduled()
+    parts.append(COUNT.pack(len(events)))
+    for event in events:
+        if event.name is None:
+            raise ValueError("Only events with a registered name can be saved in a snapshot")
+        name = event.name.encode()
+        parts.append(EVENT.pack(event.start_round, event.end_round, event.target is not None,
+                                event.target if event.target is not None else 0, len(name), len(event.args)) + name)
+        parts.append(struct.pack(f'<{len(event.args)}q', *event.args))
+
+    return b''.join(parts)
+
+
+def read_snapshot(game, data: bytes) -> None:
+    """
+    Restore the state of a game from a snapshot
+
+    Preconditions:
+        - the game has the players of the game the snapshot was taken from
+
+    :param game: the game to restore
+    :param data: the snapshot
+    :return: None
+    :raise ValueError: if the snapshot is not valid for the game
+    """
+    reader = SnapshotReader(data)
+    field = game.battlefield
+    size = field.rows * field.columns
+
+    magic, version, rows, columns, round_count, num_players, game_start = reader.unpack(HEADER)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("The data is not a game snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+    if (rows, columns) != (field.rows, field.columns):
+        raise ValueError("The snapshot has a different battlefield size")
+
+    # random numbers
+    random_state = reader.unpack(RANDOM_STATE)
+    rolls = reader.unpack_array('d', reader.unpack(COUNT)[0])
+    game.rng.setstate(((3, random_state[:625], random_state[626] if random_state[625] else None), rolls))
+
+    # sound and heat
+    field.clear()
+    field.sound.load(reader.read(size))
+    field.heat.load(reader.read(size))
+
+    # barricades
+    for _ in range(reader.unpack(COUNT)[0]):
+        x, y, kind, hp, armor = reader.unpack(OCCUPANT)
+        grid = Grid(field, (x, y))
+        field.change_occupant(x, y, HardBarricade(hp, armor, grid) if kind == grid_kind.HARD_BARRICADE else Barricade(grid))
+
+    # robots
+    for _ in range(reader.unpack(COUNT)[0]):
+        player_id, has_pos, on_field, x, y, hp, armor = reader.unpack(PLAYER)
+        if player_id not in game.players:
+            raise ValueError(f"Player {player_id} in the snapshot is not in the game")
+        player = game.players[player_id]
+        player.HP, player.armor = hp, armor
+        player.set_pos(Grid(field, (x, y)) if has_pos else None)
+        if on_field:
+            field.change_occupant(x, y, player)
+
+        states = []
+        for _ in range(reader.unpack(COUNT)[0]):
+            status, recovery_time = reader.unpack(STATE)
+            states.extend((1 if status else 0, recovery_time))
+        player.states.decode(tuple(states))
+
+        remains = reader.unpack_array('i', reader.unpack(COUNT)[0])
+        # gadgets are replaced rather than changed, they may be shared with a forked game
+        player.gadgets = [copy.copy(gadget) for gadget in player.gadgets]
+        for gadget, remain in zip(player.gadgets, remains):
+            gadget.remain = remain
+
+        player.map.load(reader.read(size))
+        player.clear_info()
+        player.vision = []
+
+    game.round_count = round_count
+    game.num_players = num_players
+    game.message_center.num_players = num_players
+    game.game_start = game_start
+
+    # events, an active event runs again from the current round
+    game.event_handler.clear()
+    for _ in range(reader.unpack(COUNT)[0]):
+        start_round, end_round, has_target, target, name_length, num_args = reader.unpack(EVENT)
+        name = reader.read(name_length).decode()
+        args = reader.unpack_array('q', num_args)
+        game.event_handler.receive_event(make_event(game, name, start_round, end_round, *args,
+                                                    target=target if has_target else None))
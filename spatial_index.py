@@ -0,0 +1,214 @@
+"""
+A spatial index of the positions of occupants on the battlefield
+
+The field is divided into square buckets, each storing the positions of
+occupants inside it. An area query only visits the buckets overlapping
+the area, so its cost depends on the number of occupants nearby rather
+than the size of the area
+
+The line index keeps the occupied positions along each row and column,
+so a straight line of fire finds its first target without stepping
+through the grids in between
+"""
+from bisect import bisect_left, bisect_right, insort
+
+
+class SpatialIndex:
+
+    def __init__(self, bucket_size: int = 8) -> None:
+        """
+        Initialize an empty spatial index
+
+        :param bucket_size: the width and height of each bucket
+        """
+        self.bucket_size = bucket_size
+        self.buckets = {}  # the positions in each bucket, (bx, by): {(x, y)}
+        # the buckets created or copied since the last fork, other buckets may be
+        # shared with a forked index and are copied before they change
+        self.owned = set()
+
+    def add(self, x: int, y: int) -> None:
+        """
+        Add the position (x, y) to the index
+
+        :param x: the x-coordinate of the position
+        :param y: the y-coordinate of the position
+        :return: None
+        """
+        key = (x // self.bucket_size, y // self.bucket_size)
+        if key not in self.buckets:
+            self.buckets[key] = set()
+            self.owned.add(key)
+        elif key not in self.owned:
+            self.unshare(key)
+        self.buckets[key].add((x, y))
+
+    def remove(self, x: int, y: int) -> None:
+        """
+        Remove the position (x, y) from the index, do nothing if it is not indexed
+
+        :param x: the x-coordinate of the position
+        :param y: the y-coordinate of the position
+        :return: None
+        """
+        key = (x // self.bucket_size, y // self.bucket_size)
+        bucket = self.buckets.get(key)
+        if bucket is not None and (x, y) in bucket:
+            if key not in self.owned:
+                bucket = self.unshare(key)
+            bucket.discard((x, y))
+            if not bucket:
+                del self.buckets[key]
+
+    def query_circle(self, x: int, y: int, radius: int) -> list[tuple]:
+        """
+        Return the indexed positions within radius of (x, y)
+
+        The positions are sorted by x-coordinate, then by y-coordinate
+
+        :param x: the x-coordinate of the center
+        :param y: the y-coordinate of the center
+        :param radius: the radius of the circle
+        :return: the positions in the circle
+        """
+        found = []
+        size = self.bucket_size
+        for bx in range((x - radius) // size, (x + radius) // size + 1):
+            for by in range((y - radius) // size, (y + radius) // size + 1):
+                for px, py in self.buckets.get((bx, by), ()):
+                    if (px - x) ** 2 + (py - y) ** 2 <= radius ** 2:
+                        found.append((px, py))
+        found.sort()
+        return found
+
+    def unshare(self, key: tuple) -> set:
+        """
+        Copy a bucket shared with a forked index before changing it
+
+        :param key: the key of the bucket
+        :return: the copy of the bucket
+        """
+        self.buckets[key] = bucket = set(self.buckets[key])
+        self.owned.add(key)
+        return bucket
+
+    def fork(self):
+        """
+        Return a copy of the index sharing the buckets until either index changes them
+
+        :return: the forked index
+        """
+        index = SpatialIndex(self.bucket_size)
+        index.buckets = dict(self.buckets)
+        self.owned = set()
+        return index
+
+
+class LineIndex:
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty index of occupied positions along each row and column
+
+        Each row and column keeps the sorted coordinates of its occupied
+        positions, so the next occupied position in a direction is found
+        with a binary search
+        """
+        self.rows = {}  # the sorted x-coordinates occupied in each row, y: [x]
+        self.columns = {}  # the sorted y-coordinates occupied in each column, x: [y]
+        # the rows and columns created or copied since the last fork, other lines
+        # may be shared with a forked index and are copied before they change
+        self.owned_rows = set()
+        self.owned_columns = set()
+
+    def add(self, x: int, y: int) -> None:
+        """
+        Add the position (x, y) to the index
+
+        Preconditions:
+            - (x, y) is not indexed
+
+        :param x: the x-coordinate of the position
+        :param y: the y-coordinate of the position
+        :return: None
+        """
+        insort(self.row(y), x)
+        insort(self.column(x), y)
+
+    def remove(self, x: int, y: int) -> None:
+        """
+        Remove the position (x, y) from the index
+
+        Preconditions:
+            - (x, y) is indexed
+
+        :param x: the x-coordinate of the position
+        :param y: the y-coordinate of the position
+        :return: None
+        """
+        row = self.row(y)
+        del row[bisect_left(row, x)]
+        column = self.column(x)
+        del column[bisect_left(column, y)]
+
+    def next_occupied(self, x: int, y: int, dx: int, dy: int):
+        """
+        Return the distance from (x, y) to the next indexed position in direction (dx, dy)
+        Return None if there is no indexed position in the direction
+
+        Preconditions:
+            - (dx, dy) in [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+        :param x: the x-coordinate of the starting point
+        :param y: the y-coordinate of the starting point
+        :param dx: the step of x-coordinate
+        :param dy: the step of y-coordinate
+        :return: the distance to the next indexed position
+        """
+        if dy == 0:
+            line, coordinate, step = self.rows.get(y, []), x, dx
+        else:
+            line, coordinate, step = self.columns.get(x, []), y, dy
+
+        if step > 0:
+            i = bisect_right(line, coordinate)
+            return line[i] - coordinate if i < len(line) else None
+        i = bisect_left(line, coordinate) - 1
+        return coordinate - line[i] if i >= 0 else None
+
+    def row(self, y: int) -> list:
+        """
+        Return the occupied x-coordinates of row y to change, a shared row is copied first
+
+        :param y: the y-coordinate of the row
+        :return: the sorted x-coordinates occupied in the row
+        """
+        if y not in self.owned_rows:
+            self.rows[y] = list(self.rows.get(y, ()))
+            self.owned_rows.add(y)
+        return self.rows[y]
+
+    def column(self, x: int) -> list:
+        """
+        Return the occupied y-coordinates of column x to change, a shared column is copied first
+
+        :param x: the x-coordinate of the column
+        :return: the sorted y-coordinates occupied in the column
+        """
+        if x not in self.owned_columns:
+            self.columns[x] = list(self.columns.get(x, ()))
+            self.owned_columns.add(x)
+        return self.columns[x]
+
+    def fork(self):
+        """
+        Return a copy of the index sharing the rows and columns until either index changes them
+
+        :return: the forked index
+        """
+        index = LineIndex()
+        index.rows = dict(self.rows)
+        index.columns = dict(self.columns)
+        self.owned_rows = set()
+        self.owned_columns = set()
+        return index